@@ -0,0 +1,82 @@
+"""generators - seeded generators of synthetic dependency graphs for the
+benchmarks. Every generator takes the number of items and a seed, and returns
+a dictionary of {item: list of items that this item depends on} whose items
+are the ints 0..n-1, where items only depend on lower numbered items, so the
+graphs never have circular dependencies.
+"""
+
+import random
+
+
+def chain(n, seed=0):
+    """A single long chain, where each item depends on the one before it
+    """
+    return {i: [i - 1] if i else [] for i in range(n)}
+
+
+def fan_in(n, seed=0):
+    """One item that directly depends on every other item
+    """
+    dependencies = {i: [] for i in range(n - 1)}
+    if n:
+        dependencies[n - 1] = list(range(n - 1))
+    return dependencies
+
+
+def fan_out(n, seed=0):
+    """One item that every other item directly depends on
+    """
+    return {i: [0] if i else [] for i in range(n)}
+
+
+def random_sparse(n, seed=0, average_degree=3):
+    """Each item depends on up to [average_degree] items chosen uniformly at
+    random from the items before it
+    """
+    rng = random.Random(seed)
+    return {i: rng.sample(range(i), min(i, average_degree)) for i in range(n)}
+
+
+def random_dense(n, seed=0, density=0.1):
+    """Each pair of items is a dependency with probability [density], so there
+    are about density * n^2 / 2 dependencies
+    """
+    rng = random.Random(seed)
+    return {i: [j for j in range(i) if rng.random() < density]
+            for i in range(n)}
+
+
+def layered(n, seed=0, max_dependencies=4):
+    """Build-system-like layers of roughly sqrt(n) items: each item depends on
+    a few items in the layer before it, and sometimes on one of the handful of
+    "library" items in the first layer that much of the graph shares
+    """
+    rng = random.Random(seed)
+    width = max(1, int(n ** 0.5))
+    num_libraries = min(width, 8)
+    dependencies = {}
+    for i in range(n):
+        layer_start = i - i % width
+        if layer_start == 0:
+            dependencies[i] = []
+            continue
+        previous_layer = range(layer_start - width, layer_start)
+        item_dependencies = rng.sample(
+            previous_layer, rng.randint(1, min(width, max_dependencies)))
+        if rng.random() < 0.25:
+            library = rng.randrange(num_libraries)
+            if library not in item_dependencies:
+                item_dependencies.append(library)
+        dependencies[i] = item_dependencies
+    return dependencies
+
+
+# {name: (generator, function of n estimating the number of dependencies)}
+GENERATORS = {
+    "chain": (chain, lambda n: n),
+    "fan_in": (fan_in, lambda n: n),
+    "fan_out": (fan_out, lambda n: n),
+    "random_sparse": (random_sparse, lambda n: 3 * n),
+    "random_dense": (random_dense, lambda n: n * n // 20),
+    "layered": (layered, lambda n: 3 * n),
+}
@@ -0,0 +1,252 @@
+"""run - time the Dependencies class on the synthetic graphs of the generators
+module at growing sizes, and save the time and peak memory of every operation
+as JSON, so that runs can be compared. From the root of the repository:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 10 100 1000 --generators chain layered
+    python -m benchmarks.run --compare before.json after.json
+
+An operation is skipped for a size of a graph once it would take longer than
+--time-limit seconds, assuming that its time grows at least linearly from the
+previous size, so the scaling curves stop where an operation gets too slow
+instead of running for hours.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from dependency_algorithm import Dependencies
+
+from .generators import GENERATORS
+
+
+DEFAULT_SIZES = (10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6)
+
+
+def _construct(dependencies):
+    return lambda: Dependencies(dependencies)
+
+
+def _dependencies_exist(dependencies):
+    deps = Dependencies(dependencies)
+    return lambda: deps.dependencies_exist(verbose=False)
+
+
+def _complete_dependencies_dict(dependencies):
+    deps = Dependencies(dependencies)
+    return deps.complete_dependencies_dict
+
+
+def _resolve_dependencies(dependencies):
+    deps = Dependencies(dependencies)
+    return deps.resolve_dependencies
+
+
+def _no_circular_dependencies(dependencies):
+    deps = Dependencies(dependencies)
+    return deps.no_circular_dependencies
+
+
+def _check_ordering(dependencies):
+    deps = Dependencies(dependencies)
+    ordering = deps.resolve_dependencies()
+    return lambda: deps.is_correct_ordering(ordering)
+
+
+def _transitive_reduction(dependencies):
+    deps = Dependencies(dependencies)
+    deps.resolve_dependencies()
+    return deps.transitive_reduction
+
+
+def _depends_on_many(dependencies):
+    deps = Dependencies(dependencies)
+    deps.resolve_dependencies()
+    items = list(dependencies)
+    rng = random.Random(0)
+    pairs = [(rng.choice(items), rng.choice(items)) for _ in range(10 ** 4)]
+    return lambda: deps.depends_on_many(pairs)
+
+
+# {name: function of a dictionary of dependencies that does any setup that
+# shouldn't be timed, and returns a function running the operation once}
+OPERATIONS = {
+    "construct": _construct,
+    "dependencies_exist": _dependencies_exist,
+    "complete_dependencies_dict": _complete_dependencies_dict,
+    "resolve_dependencies": _resolve_dependencies,
+    "no_circular_dependencies": _no_circular_dependencies,
+    "check_ordering": _check_ordering,
+    "transitive_reduction": _transitive_reduction,
+    "depends_on_many": _depends_on_many,
+}
+
+
+def measure(operation, dependencies, repeat=3, memory=True):
+    """Time an operation on a graph, setting it up again before every run so
+    that nothing is cached between runs
+
+    Parameters
+    ----------
+    operation : str
+        One of OPERATIONS
+
+    dependencies : dict
+        The graph, from one of the generators
+
+    repeat : int (default of 3)
+        How many times to run the operation, stopping early once a run takes
+        over a second
+
+    memory : bool (default of True)
+        Whether to run the operation once more with tracemalloc, which is much
+        slower, to measure its peak memory
+
+    Returns
+    -------
+    seconds : float
+        The fastest run
+
+    peak_memory : int or None
+        The most memory allocated at once while running the operation, in
+        bytes, not counting the setup
+
+    """
+    seconds = None
+    for _ in range(repeat):
+        run_operation = OPERATIONS[operation](dependencies)
+        start_time = time.perf_counter()
+        run_operation()
+        run_seconds = time.perf_counter() - start_time
+        seconds = run_seconds if seconds is None else min(seconds, run_seconds)
+        if run_seconds > 1:
+            break
+
+    peak_memory = None
+    if memory:
+        run_operation = OPERATIONS[operation](dependencies)
+        tracemalloc.start()
+        try:
+            run_operation()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak_memory
+
+
+def run(generators, sizes, operations, seed=0, repeat=3, memory=True,
+        time_limit=10.0, max_edges=5 * 10 ** 6, verbose=True):
+    """Measure every operation on every generator's graph at every size
+
+    Returns
+    -------
+    results : list of dicts
+        One {"generator", "size", "edges", "operation", "seconds",
+        "peak_memory"} dict per measurement, where skipped measurements have
+        a "skipped" reason instead of "seconds" and "peak_memory"
+
+    """
+    results = []
+    for generator_name in generators:
+        generator, estimate_edges = GENERATORS[generator_name]
+        last_measured = {}  # -- operation -> (size, seconds)
+        for size in sorted(sizes):
+            if estimate_edges(size) > max_edges:
+                dependencies, num_edges = None, estimate_edges(size)
+            else:
+                dependencies = generator(size, seed)
+                num_edges = sum(map(len, dependencies.values()))
+            for operation in operations:
+                result = {"generator": generator_name, "size": size,
+                          "edges": num_edges, "operation": operation}
+                if dependencies is None:
+                    result["skipped"] = "max edges"
+                elif operation in last_measured and \
+                        last_measured[operation][1] * size / \
+                        last_measured[operation][0] > time_limit:
+                    result["skipped"] = "time limit"
+                else:
+                    result["seconds"], result["peak_memory"] = measure(
+                        operation, dependencies, repeat=repeat, memory=memory)
+                    last_measured[operation] = (size, result["seconds"])
+                results.append(result)
+                if verbose:
+                    print(_format_result(result))
+    return results
+
+
+def _format_result(result):
+    if "skipped" in result:
+        measurement = "skipped ({})".format(result["skipped"])
+    else:
+        measurement = "{:12.6f} s".format(result["seconds"])
+        if result["peak_memory"] is not None:
+            measurement += " {:10.2f} MB".format(result["peak_memory"] / 1e6)
+    return "{:<14} {:>8} {:<27} {}".format(
+        result["generator"], result["size"], result["operation"], measurement)
+
+
+def compare(before, after):
+    """Print the ratio of the times and peak memory of two runs, for every
+    measurement that is in both
+    """
+    def key(result):
+        return result["generator"], result["size"], result["operation"]
+
+    before_results = {key(result): result for result in before["results"]
+                      if "skipped" not in result}
+    for result in after["results"]:
+        before_result = before_results.get(key(result))
+        if before_result is None or "skipped" in result:
+            continue
+        line = "{:<14} {:>8} {:<27} time x{:.2f}".format(
+            *key(result) + (result["seconds"] / before_result["seconds"],))
+        if result["peak_memory"] and before_result["peak_memory"]:
+            line += "  memory x{:.2f}".format(
+                result["peak_memory"] / before_result["peak_memory"])
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--generators", nargs="+", default=list(GENERATORS),
+                        choices=list(GENERATORS))
+    parser.add_argument("--operations", nargs="+", default=list(OPERATIONS),
+                        choices=list(OPERATIONS))
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    parser.add_argument("--max-edges", type=int, default=5 * 10 ** 6)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="don't measure peak memory, which is slow")
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON files of results and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    results = run(args.generators, args.sizes, args.operations,
+                  seed=args.seed, repeat=args.repeat,
+                  memory=not args.no_memory, time_limit=args.time_limit,
+                  max_edges=args.max_edges)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"python": sys.version, "platform": platform.platform(),
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "seed": args.seed, "results": results},
+                      output, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+from .closure import BitsetClosure, SetClosure
 from .dependency_algorithm import (
     CircularDependencyException,
     Dependencies,
+    FrozenDependencies,
     MissingDependencyException
-)
\ No newline at end of file
+)
+from .execution import TaskResult
+from .instrumentation import Stats
+from .run_cache import DirectoryRunCache, RunCache, SQLiteRunCache
@@ -0,0 +1,286 @@
+"""cli - the dependency-algorithm command, which reads a graph from a JSON,
+JSON lines or edge-list file (or standard input) and writes the result of one
+command to standard output, a line at a time as it is computed:
+
+    dependency-algorithm validate graph.jsonl
+    dependency-algorithm order graph.csv --add-missing > order.txt
+    cat graph.json | dependency-algorithm levels --format json
+    dependency-algorithm closure graph.tsv --delimiter "\t" --stats
+    dependency-algorithm dependents graph.jsonl C --direct
+
+Items are written one per line, as JSON so that any item can be read back.
+The exit status is 1 if the graph isn't valid or can't be resolved.
+"""
+
+import argparse
+from contextlib import nullcontext
+import csv
+import json
+import os
+import sys
+import time
+
+from .dependency_algorithm import (
+    CircularDependencyException,
+    Dependencies,
+    MissingDependencyException
+)
+from .instrumentation import Stats
+
+try:
+    import resource
+except ImportError:  # -- not available on Windows
+    resource = None
+
+
+FORMATS = ("json", "jsonl", "edges")
+COMMANDS = ("validate", "order", "levels", "closure", "dependents")
+
+# File extensions that the format is guessed from, anything else is an edge
+# list
+_EXTENSION_FORMATS = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class InvalidGraphException(Exception):
+    """Raised by the validate command once it has written every problem, if
+    any of them stop the items from resolving
+    """
+    pass
+
+
+def read_graph(path, file_format=None, delimiter=",", header=False,
+               add_missing=False, stats=None):
+    """Read a Dependencies object from a file, see Dependencies.from_jsonl
+    and Dependencies.from_csv for the JSON lines and edge-list formats. A
+    JSON file holds a single {item: [dependency, ...]} object.
+
+    Parameters
+    ----------
+    path : str
+        The file to read, or "-" for standard input
+
+    file_format : str (default of None)
+        One of FORMATS, when None it is guessed from the extension of [path],
+        or is "jsonl" for standard input
+
+    delimiter, header
+        See Dependencies.from_csv
+
+    add_missing : bool (default of False)
+        See Dependencies.from_edges
+
+    stats : Stats (default of None)
+        See Dependencies
+
+    Returns
+    -------
+    dependencies : Dependencies
+
+    """
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = "jsonl" if path == "-" else \
+            _EXTENSION_FORMATS.get(extension, "edges")
+    source = sys.stdin if path == "-" else path
+    if file_format == "json":
+        if path == "-":
+            dependencies = json.load(sys.stdin)
+        else:
+            with open(path) as json_file:
+                dependencies = json.load(json_file)
+        if not isinstance(dependencies, dict):
+            raise ValueError("a JSON graph must be an object of {item: "
+                             "[dependency, ...]}")
+        if add_missing:
+            for item_dependencies in list(dependencies.values()):
+                for dependency in item_dependencies:
+                    dependencies.setdefault(dependency, [])
+        return Dependencies(dependencies, stats=stats)
+    if file_format == "jsonl":
+        return Dependencies.from_jsonl(source, add_missing=add_missing,
+                                       stats=stats)
+    return Dependencies.from_csv(source, delimiter=delimiter, header=header,
+                                 add_missing=add_missing, stats=stats)
+
+
+def run_command(dependencies, command, items=(), direct=False):
+    """Generate the lines of output of [command], one of COMMANDS, computing
+    each line only when it is asked for
+
+    Parameters
+    ----------
+    dependencies : Dependencies
+        The graph to run the command on
+
+    command : str
+        validate   -- one {"problem": kind, "details": ...} object per
+                      problem found by Dependencies.validate, where isolated
+                      items are left out since they don't stop the items
+                      from resolving, then InvalidGraphException is raised
+                      if the graph isn't valid (repeated dependencies are
+                      reported, but don't make it invalid)
+        order      -- the items in an order that resolves them
+        levels     -- a list of items per level, see
+                      Dependencies.resolve_levels
+        closure    -- one {"item": item, "dependencies": [...]} object per
+                      item, with its complete dependencies, in the JSON lines
+                      format that graphs are read from, see
+                      Dependencies.iter_complete_dependencies
+        dependents -- the items that depend on [items], see
+                      Dependencies.dependents
+
+    items : list (default of ())
+        The items to find the dependents of, for the dependents command
+
+    direct : bool (default of False)
+        Whether the dependents command only finds the direct dependents
+
+    Yields
+    ------
+    line : str
+        A line of JSON, without the newline
+
+    """
+    if command == "validate":
+        report = dependencies.validate()
+        for line in validation_lines(report):
+            yield line
+        if not report["valid"]:
+            raise InvalidGraphException("the graph isn't valid")
+    elif command == "order":
+        for item in dependencies.resolve_dependencies():
+            yield json.dumps(item)
+    elif command == "levels":
+        for level in dependencies.resolve_levels():
+            yield json.dumps(level)
+    elif command == "closure":
+        for item, complete_dependencies in \
+                dependencies.iter_complete_dependencies():
+            yield json.dumps({"item": item,
+                              "dependencies": complete_dependencies})
+    elif command == "dependents":
+        seen = set()
+        for item in items:
+            for dependent in dependencies.dependents(
+                    item, transitive=not direct):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    yield json.dumps(dependent)
+    else:
+        raise ValueError("[command] must be one of {}".format(COMMANDS))
+
+
+def validation_lines(report):
+    """Generate a line of JSON for every problem in [report], from
+    Dependencies.validate, see run_command
+    """
+    for problem in ("missing_dependencies", "self_dependencies", "cycles",
+                    "duplicate_dependencies"):
+        for details in report[problem]:
+            yield json.dumps({"problem": problem, "details": details})
+
+
+def peak_memory():
+    """The most memory this process has used at once, in bytes, or None if it
+    can't be measured on this platform
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _parse_item(text, dependencies):
+    """Read an item given on the command line as it is if it is an item,
+    otherwise as JSON if it is valid JSON (so integer items can be given)
+    """
+    if text in dependencies.dependencies:
+        return text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="dependency-algorithm", description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 1)[1])
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("path", nargs="?", default="-",
+                        help='the graph file to read, "-" (the default) for '
+                             'standard input')
+    parser.add_argument("items", nargs="*",
+                        help="the items to find the dependents of")
+    parser.add_argument("--format", choices=FORMATS, dest="file_format",
+                        help="the format of the graph, guessed from the file "
+                             "extension by default")
+    parser.add_argument("--delimiter", default=",",
+                        help='the delimiter of an edge list, ex. "\\t"')
+    parser.add_argument("--header", action="store_true",
+                        help="skip the first line of an edge list")
+    parser.add_argument("--add-missing", action="store_true",
+                        help="make dependencies that are never given as "
+                             "items into items without dependencies")
+    parser.add_argument("--direct", action="store_true",
+                        help="only find the direct dependents")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the time spent in each phase and the "
+                             "peak memory to standard error at the end")
+    args = parser.parse_args(argv)
+    if args.command == "dependents" and not args.items:
+        parser.error("the dependents command needs at least one item")
+    if args.command != "dependents" and args.items:
+        parser.error("only the dependents command takes items")
+    delimiter = args.delimiter.encode().decode("unicode_escape")
+
+    stats = Stats() if args.stats else None
+    start_time = time.perf_counter()
+    valid = True
+    try:
+        try:
+            with stats.phase("read") if stats is not None else nullcontext():
+                dependencies = read_graph(
+                    args.path, args.file_format, delimiter, args.header,
+                    args.add_missing, stats)
+        except (OSError, ValueError, KeyError, TypeError, csv.Error) as e:
+
+            # ex. a JSON lines record without an "item", an unhashable
+            # dependency or a malformed edge list
+            print("dependency-algorithm: can't read {}: {}".format(
+                args.path, "no {} key".format(e) if isinstance(e, KeyError)
+                else e), file=sys.stderr)
+            return 1
+        items = [_parse_item(item, dependencies) for item in args.items]
+        unknown_items = [item for item in items
+                         if item not in dependencies.dependencies]
+        if unknown_items:
+            print("dependency-algorithm: not item(s): {}".format(
+                unknown_items), file=sys.stderr)
+            return 1
+        for line in run_command(dependencies, args.command, items,
+                                args.direct):
+            sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    except (MissingDependencyException, CircularDependencyException,
+            InvalidGraphException) as e:
+        sys.stdout.flush()
+        print("dependency-algorithm: {}".format(e), file=sys.stderr)
+        valid = False
+    except BrokenPipeError:
+
+        # The reader stopped early (ex. head), which isn't an error, but
+        # Python would complain when flushing stdout on the way out
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if stats is not None:
+            report = stats.as_dict()
+            report["total_seconds"] = time.perf_counter() - start_time
+            report["peak_memory"] = peak_memory()
+            print(json.dumps(report), file=sys.stderr)
+    return 0 if valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
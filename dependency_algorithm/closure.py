@@ -0,0 +1,311 @@
+"""closure - compact representations of the complete dependencies of items
+"""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Closure(Mapping):
+    """The complete dependencies of every item of a CompactGraph, stored as one
+    row per node, which is indexed by node.
+
+    Rows are computed in an order such that every node comes after all of its
+    dependencies, so the row of each node is the union of the rows of its
+    direct dependencies along with the dependencies themselves, and each row
+    is computed exactly once. Subclasses decide how a row is stored.
+
+    This class is a read-only mapping of {item: list of complete dependencies}
+    so it can be used wherever a dictionary of complete dependencies is
+    expected, but the lists are only produced from the rows when an item is
+    looked up, in the order the items were added. The update and remove
+    methods keep the rows up to date as items change.
+    """
+
+    __slots__ = ("graph", "rows")
+
+    empty_row = None
+    decode_row = None
+
+    def __init__(self, graph):
+        """Initialize the Closure object
+
+        Parameters
+        ----------
+        graph : CompactGraph
+            The graph of direct dependencies
+
+        """
+        self.graph = graph
+        self.rows = []
+
+
+    @classmethod
+    def from_order(cls, graph, ordered_nodes):
+        """Build the complete dependencies of every node
+
+        Parameters
+        ----------
+        graph : CompactGraph
+            The graph of direct dependencies
+
+        ordered_nodes : iterable of int
+            The nodes of the items, ordered such that every node comes after
+            all of its dependencies
+
+        Returns
+        -------
+        closure : Closure
+            The complete dependencies of every node in [ordered_nodes]
+
+        """
+        closure = cls(graph)
+        closure.update(ordered_nodes)
+        return closure
+
+
+    @classmethod
+    def from_disk_cache(cls, graph, cache):
+        """Read the complete dependencies of every node from a DiskCache of
+        [graph], decoding each row the first time it is used
+        """
+        closure = cls(graph)
+        closure.rows = MappedRows(cache, cls.decode_row)
+        return closure
+
+
+    def copy(self, graph):
+        """Return a copy of the rows for a copy of the graph, which can be 
+        updated independently. Rows are never changed in place, only 
+        replaced, so they are shared with the copy.
+        """
+        closure = type(self)(graph)
+        rows = self.rows
+        closure.rows = [rows[i] for i in range(len(rows))]
+        return closure
+
+
+    def update(self, ordered_nodes):
+        """Recompute the rows of some nodes, which may be new, ordered such
+        that every node comes after those of its dependencies that are
+        recomputed too
+        """
+        rows = self.rows
+        if len(rows) < self.graph.num_nodes:
+            rows.extend([self.empty_row] * (self.graph.num_nodes - len(rows)))
+        dependencies_of = self.graph.dependencies_of
+        for i in ordered_nodes:
+            rows[i] = self._union(dependencies_of(i))
+
+
+    def remove(self, i):
+        """Forget the row of node [i], whose item has been removed
+        """
+        self.rows[i] = self.empty_row
+
+
+    def _union(self, dependencies):
+        """Return the row of a node with direct [dependencies], from the rows of
+        those dependencies
+        """
+        raise NotImplementedError
+
+
+    def nodes(self, i):
+        """Return the complete dependencies of node [i], as an iterable of
+        nodes in ascending order
+        """
+        raise NotImplementedError
+
+
+    def contains(self, i, j):
+        """Whether node [i] depends, directly or not, on node [j]
+        """
+        raise NotImplementedError
+
+
+    def redundant_dependencies(self, dependencies):
+        """Return the set of nodes in [dependencies] (the direct dependencies 
+        of a node) that one of the other nodes in [dependencies] already 
+        depends on, directly or not
+        """
+        raise NotImplementedError
+
+
+    def depends_on(self, item, dependency):
+        """Whether item [item] depends, directly or not, on [dependency]
+        """
+        return self.contains(self.graph.node(item), self.graph.node(dependency))
+
+
+    def __getitem__(self, item):
+        items = self.graph.items
+        return [items[j] for j in self.nodes(self.graph.node(item))]
+
+
+    def __iter__(self):
+        items = self.graph.items
+        return (items[i] for i in self.graph.nodes())
+
+
+    def __len__(self):
+        return self.graph.num_items
+
+
+    def __contains__(self, item):
+        return self.graph.is_item(item)
+
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SetClosure(Closure):
+    """The complete dependencies of every item, stored as one sorted array of
+    node indices per item.
+    """
+
+    __slots__ = ()
+
+    empty_row = array("i")
+
+    def _union(self, dependencies):
+        rows = self.rows
+        row = set(dependencies)
+        for j in dependencies:
+            row.update(rows[j])
+        return array("i", sorted(row))
+
+
+    def nodes(self, i):
+        return self.rows[i]
+
+
+    def contains(self, i, j):
+        row = self.rows[i]
+        position = bisect_left(row, j)
+        return position < len(row) and row[position] == j
+
+
+    def redundant_dependencies(self, dependencies):
+        rows = self.rows
+        covered = set()
+        for k in dependencies:
+            covered.update(rows[k])
+        return covered.intersection(dependencies)
+
+
+class BitsetClosure(Closure):
+    """The complete dependencies of every item, stored as one bitset per item.
+
+    The complete dependencies of the node with index i are stored as a Python
+    int whose bit j is set when the node depends on the node with index j, so
+    rows are unioned with a single bitwise or, and checking whether one item
+    depends on another is a single bit lookup.
+    """
+
+    __slots__ = ()
+
+    empty_row = 0
+
+    def _union(self, dependencies):
+        rows = self.rows
+        row = 0
+        for j in dependencies:
+            row |= rows[j] | (1 << j)
+        return row
+
+
+    def nodes(self, i):
+        return self.row_nodes(self.rows[i])
+
+
+    @staticmethod
+    def row_nodes(row):
+        """Turn a bitset into the ascending node indices of its set bits
+        """
+        decoded = []
+        reversed_bits = format(row, 'b')[::-1]
+        position = reversed_bits.find('1')
+        while position != -1:
+            decoded.append(position)
+            position = reversed_bits.find('1', position + 1)
+        return decoded
+
+
+    @staticmethod
+    def decode_row(nodes):
+        """Turn the ascending node indices of a row into a bitset
+        """
+        row = 0
+        for j in nodes:
+            row |= 1 << j
+        return row
+
+
+    def bits(self, item):
+        """Return the bitset of complete dependencies for item [item]
+        """
+        return self.rows[self.graph.node(item)]
+
+
+    def contains(self, i, j):
+        return bool(self.rows[i] >> j & 1)
+
+
+    def redundant_dependencies(self, dependencies):
+        rows = self.rows
+        covered = 0
+        for k in dependencies:
+            covered |= rows[k]
+        return {j for j in dependencies if covered >> j & 1}
+
+
+class MappedRows(object):
+    """The rows of a Closure, read from the memory-mapped arrays of a 
+    DiskCache as they are used. Rows that are recomputed or added afterwards,
+    and rows that had to be decoded, are kept in changed_rows.
+    """
+
+    __slots__ = ("cache", "decode", "changed_rows", "num_rows")
+
+    def __init__(self, cache, decode=None):
+        """Initialize the MappedRows object
+
+        Parameters
+        ----------
+        cache : DiskCache
+            The cache to read rows from
+
+        decode : callable (default of None)
+            Function to turn the node indices of a row into the Closure's form
+            of row, when None the node indices are used directly
+
+        """
+        self.cache = cache
+        self.decode = decode
+        self.changed_rows = {}
+        self.num_rows = len(cache.closure_offsets) - 1
+
+
+    def __getitem__(self, i):
+        row = self.changed_rows.get(i)
+        if row is None:
+            row = self.cache.closure_row(i)
+            if self.decode is not None:
+                row = self.changed_rows[i] = self.decode(row)
+        return row
+
+
+    def __setitem__(self, i, row):
+        self.changed_rows[i] = row
+
+
+    def __len__(self):
+        return self.num_rows
+
+
+    def extend(self, rows):
+        for row in rows:
+            self.changed_rows[self.num_rows] = row
+            self.num_rows += 1
@@ -2,7 +2,28 @@
 resolve dependencies
 """
 
-from itertools import permutations 
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from contextlib import nullcontext
+import csv
+import json
+from math import factorial
+from operator import lt
+import random
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import execution, run_cache, scheduling
+from .closure import BitsetClosure, SetClosure
+from .disk_cache import DiskCache, graph_digest
+from .graph import CompactGraph, DependencyMapping
+from .instrumentation import Stats
+from .reachability import ReachabilityIndex
 
 
 class MissingDependencyException(Exception):
@@ -12,9 +33,23 @@ class MissingDependencyException(Exception):
 
 
 class CircularDependencyException(Exception):
-    """Exception for when a circular dependency occurs
+    """Exception for when a circular dependency occurs. The cycles attribute 
+    lists the circular dependencies that were found, in the same form as 
+    Dependencies.find_cycles.
     """
-    pass
+    
+    def __init__(self, message="", cycles=()):
+        super().__init__(message)
+        self.cycles = list(cycles)
+
+
+def _open(path, **kwargs):
+    """Open the file at [path], or if [path] is already an open file, return a 
+    context manager that leaves it open
+    """
+    if hasattr(path, "read"):
+        return nullcontext(path)
+    return open(path, **kwargs)
 
 
 class Dependencies(object):
@@ -41,180 +76,329 @@ class Dependencies(object):
     ordered in for them to successfully resolve. In this case, the only possible
     order is C --> B --> A, as any other ordering would result in an item being
     "executed" before one of more of its dependencies.
+    
+    Internally, items are interned to integer node indices and the 
+    dependencies are kept as flat arrays of node indices (see the CompactGraph
+    class), which every algorithm runs on, and items are only translated back 
+    at the boundary of the public methods. For large graphs, the complete 
+    dependencies can be kept as one bitset per item instead of one array per 
+    item by using closure_mode="bitset", see the BitsetClosure class for 
+    details.
     """
     
-    def __init__(self, dependencies = {}):
+    closure_modes = ("sets", "bitset")
+    affected_cache_size = 1024
+    
+    def __init__(self, dependencies = {}, closure_mode="sets", cache_dir=None, 
+                 stats=None):
         """Initialize the Dependencies object
+        
+        Parameters
+        ----------
+        dependencies : dict
+            A dictionary of {item: list of items that this item depends on}
+            
+        closure_mode : str (default of "sets")
+            How the complete dependencies of each item are stored, either 
+            "sets" for one sorted array of items per item, or "bitset" for one
+            integer bitset per item, see the closure module
+            
+        cache_dir : str (default of None)
+            Optional directory to keep the ordering, levels and complete 
+            dependencies in, under a hash of the dependencies. They are saved 
+            the first time the complete dependencies are computed, and another
+            Dependencies object with the same dependencies memory-maps them 
+            back in instead of recomputing them, see the disk_cache module.
+            
+        stats : Stats or bool (default of None)
+            Optional Stats object to count cache hits, items and dependencies 
+            visited and time spent in each phase into (True for a new one), 
+            which is kept in self.stats. Nothing is counted when None.
+            
+        """
+        assert isinstance(dependencies, Mapping), '[items] must be a dict'
+        assert closure_mode in self.closure_modes, \
+            '[closure_mode] must be one of {}'.format(self.closure_modes)
+        self._graph = CompactGraph.from_dependencies(dependencies)
+        self.closure_mode = closure_mode
+        self.cache_dir = cache_dir
+        self.stats = Stats() if stats is True else stats or None
+        self._known_dependencies = None
+        self._partial_dependencies = None  # -- complete dependencies of the
+        self._partial_nodes = None         #    nodes flagged here, see
+                                           #    self.complete_dependencies
+        self._reachability_index = None
+        self._order = None            # -- nodes in order, -1 if removed
+        self._order_positions = None  # -- node -> position in self._order
+        self._resolution_order_components_cache = None
+        self._affected_cache = {}
+        self._disk_cache = None       # -- None until looked up, then False
+        self._graph_digest = None     #    if there isn't a usable one
+        
+    
+    @classmethod
+    def from_edges(cls, edges, add_missing=False, **kwargs):
+        """Create a Dependencies object straight from (item, dependency) pairs,
+        without building a dictionary of items first. The pairs are read one 
+        at a time into the arrays of node indices that this class works on, 
+        so an iterator over a large file never has to fit in memory as Python
+        objects.
+        
+        Parameters
+        ----------
+        edges : iterable of tuples
+            (item, dependency) pairs, meaning that item depends on dependency,
+            in any order. A dependency of None only declares the item (for 
+            items without dependencies), and repeated pairs are only counted 
+            once. Items resolve in the order they are first mentioned when 
+            ties are broken.
+            
+        add_missing : bool (default of False)
+            If True, dependencies that are never given as items become items 
+            without dependencies, otherwise they are left as missing 
+            dependencies, see self.missing_dependencies
+            
+        **kwargs
+            Passed on to Dependencies, ex. closure_mode
+            
+        Returns
+        -------
+        dependencies : Dependencies
+            
+        """
+        dependencies = cls(**kwargs)
+        dependencies._graph = CompactGraph.from_edges(edges, add_missing)
+        return dependencies
+    
+    
+    @classmethod
+    def from_csv(cls, path, delimiter=",", header=False, add_missing=False, 
+                 **kwargs):
+        """Create a Dependencies object from a CSV file of item,dependency 
+        rows, streaming it one row at a time, see self.from_edges. A row with 
+        only an item (or an empty dependency) declares the item.
+        
+        Parameters
+        ----------
+        path : str or file object
+            The CSV file to read, or an open file (ex. sys.stdin) to read from
+            
+        delimiter : str (default of ",")
+            The character separating the item from the dependency
+            
+        header : bool (default of False)
+            Whether the first row is a header to skip
+            
+        add_missing, **kwargs
+            See self.from_edges
+            
+        Returns
+        -------
+        dependencies : Dependencies
+            
+        """
+        with _open(path, newline="") as csv_file:
+            rows = csv.reader(csv_file, delimiter=delimiter)
+            if header:
+                next(rows, None)
+            return cls.from_edges(
+                ((row[0], row[1] if len(row) > 1 and row[1] else None) 
+                 for row in rows if row), 
+                add_missing=add_missing, **kwargs)
+    
+    
+    @classmethod
+    def from_jsonl(cls, path, add_missing=False, **kwargs):
+        """Create a Dependencies object from a JSON lines file, streaming it one
+        line at a time, see self.from_edges. Each line is either an [item, 
+        dependency] array, or an {"item": item, "dependencies": [dependency, 
+        ...]} object (where "dependencies" may be left out).
+        
+        Parameters
+        ----------
+        path : str or file object
+            The JSON lines file to read, or an open file to read from
+            
+        add_missing, **kwargs
+            See self.from_edges
+            
+        Returns
+        -------
+        dependencies : Dependencies
+            
+        """
+        def read_edges(jsonl_file):
+            for line in jsonl_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    yield record["item"], None
+                    for dependency in record.get("dependencies", ()):
+                        yield record["item"], dependency
+                else:
+                    item, dependency = record
+                    yield item, dependency
+        
+        with _open(path) as jsonl_file:
+            return cls.from_edges(read_edges(jsonl_file), 
+                                  add_missing=add_missing, **kwargs)
+        
+    
+    @property
+    def dependencies(self):
+        """A read-only dictionary of {item: list of items that this item 
+        depends on}, see self.add_item to change it
+        """
+        return DependencyMapping(self._graph)
+        
+    
+    @property
+    def possible_items(self):
+        """The list of items, in the order they were added
+        """
+        return list(self.dependencies)
+        
+    
+    def _count(self, name, amount=1):
+        """Add [amount] to the counter [name] of self.stats, if there is one
         """
-        assert isinstance(dependencies, dict), '[items] must be a dict'
-        self.dependencies = dependencies.copy()
-        self.possible_items = list(dependencies.keys())
-        self._known_dependencies = {}
+        if self.stats is not None:
+            self.stats.count(name, amount)
+    
+    
+    def _phase(self, name):
+        """Context manager timing phase [name] into self.stats, if there is one
+        """
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.phase(name)
+    
+    
+    def missing_dependencies(self):
+        """List the dependencies that aren't items
         
+        Returns
+        -------
+        missing_dependencies : list of tuples
+            An (item, dependency) pair for every dependency that isn't an item,
+            in the order of the items
+            
+        """
+        with self._phase("validation"):
+            missing_dependencies = self._graph.missing_dependencies()
+        items = self._graph.items
+        return [(items[i], items[j]) for i, j in missing_dependencies]
+    
     
     def dependencies_exist(self, verbose=True):
         """Check if the user inputted partial dependencies (self.items) all 
-        exist
+        exist, printing the ones that don't if [verbose]. See self.validate 
+        for a report of every problem, without printing.
         
         Returns
         -------
         whether_dependencies_exist : bool
             True or False, whether all dependencies exist or not
         """
-        all_dependencies_exist = True
-        for item, dependencies in self.dependencies.items():
-            for dependency in dependencies:
-                if dependency not in self.possible_items:
-                    if verbose:
-                        print('Non-existant dependency: ({0}, {1})'.format(
-                            item, dependency))
-                    all_dependencies_exist = False
-        return all_dependencies_exist
-    
-    
-    def _enhanced_list_dependencies(self, my_items, item, known_dependencies={}, 
-                                    call_stack_order=set(), debug=False):
-        """List the complete set of items that are dependent on a given item 
-        (item) in an items dictionary (my_items).
-
-        Parameters
-        ----------
-        my_items : dict
-            A dictionary of {item: list of items that this item depends on}
-
-        item : int or str
-            The item in my_items that we want to return a full list of items 
-            that this item depends on
-
-        known_dependencies : dict (default of an empty dictionary)
-            A dictionary of {item: list of items that this item depends on} that
-            is known to be complete. The difference between this and my_items is
-            that, for example, if A is dependent on B which is dependent on C 
-            which is dependent on nothing, my_items might look like:
-
-            {
-                "A": "B",
-                "B": "C",
-                "C": []
-            }
-
-            whereas known_dependencies, when it is complete, will look like:
-
-            {
-                "A": ["B", "C"],
-                "B": ["C"],
-                "C": []
-            }
-
-            This function will use known_dependencies as a cache to store known
-            complete dependencies. 
-
-        call_stack_order : set
-            Whenever we have NOT cached the dependencies for an item, we 
-            recursively call this function to find that item's dependencies. 
-            When this happens, we add the item that we are recursively calling 
-            this function for to the call_stack_order. Each item should only be 
-            appearing once in this list because we cache (basically memoize) the
-            results of each recursive call. The reason we keep this list is to 
-            discover circular dependencies, aka when item 1 is dependent on item
-            2 which is dependent on item 1, and so forth. If we don't save 
-            call_stack_order and use it to discover circular dependencies, 
-            circular dependencies will result in an infinite loop of recursive 
-            calls, and will raise an exception when Python's recurssion limit is
-            reached.
-
-        debug : bool (default of False)
-            In debug mode, this function will print out statements as it 
-            recursively travels the tree of dependencies. 
-
+        missing_dependencies = self.missing_dependencies()
+        if verbose:
+            for item, dependency in missing_dependencies:
+                print('Non-existant dependency: ({0}, {1})'.format(
+                    item, dependency))
+        return not missing_dependencies
+    
+    
+    def validate(self):
+        """Check the items for every kind of problem at once, without printing
+        anything, in O(V+E) time for V items and E dependencies: one pass 
+        over the dependencies of every item, and one to find the circular 
+        dependencies (see self.find_cycles).
+        
         Returns
         -------
-        item_dependencies : list
-            The complete list of items that [item] depends on in [my_items]
-
-        known_dependencies : dict
-            See above, primarily used as a caching mechanism. If the goal here 
-            was just to list the complete set of items that an item depends on, 
-            we could probably just add memoization to this function, but the 
-            benefit of using known_dependencies is that we can re-use it when 
-            looping through an entire items dictionary
-            
-        call_stack_order : set
-            See above
-
+        report : dict
+            A dictionary with the keys:
+            
+            valid -- True if there are no missing or circular dependencies, 
+                so that the items can be resolved (repeated dependencies and 
+                isolated items don't stop that)
+            missing_dependencies -- an (item, dependency) pair for every 
+                dependency that isn't an item, see self.missing_dependencies
+            self_dependencies -- the items that depend on themselves
+            cycles -- every circular dependency, see self.find_cycles
+            duplicate_dependencies -- an (item, dependency) pair for every 
+                dependency that an item lists more than once, once per repeat
+            isolated_items -- the items without dependencies that no other 
+                item depends on
+            
+            Every list is in the order of the items.
+            
         """
-
-        # List of dependnecies for an item, initially populate with the known 
-        # dependencies
-        item_dependencies = my_items[item]
-        if not isinstance(item_dependencies, list):
-            item_dependencies = list(item_dependencies) 
-
-        if debug:
-            print("* Current call stack order:", call_stack_order)
-            print("Initial item dependencies for {}: ".format(item), 
-                item_dependencies)
-            print("Current state of known dependencies:", known_dependencies)
-
-
-        # Traverse the tree of dependencies
-        for dependency in item_dependencies:
-
-
-            # Check to see if we've already cached the dependency or not...
-            new_dependencies = known_dependencies.get(dependency)
-
-            if debug:
-                print("> Looking into dependency: ", dependency)
-                print("** New deps:", new_dependencies)
-
-            if new_dependencies is not None:
-
-                # We HAVE cached the dependencies
-                if debug:
-                    print(">> Dependency for {} known: ".format(dependency), 
-                        new_dependencies)
-
-            else:
-
-                # We have NOT cached the dependencies
-                if debug:
-                    print(">> Dependency for {} unknown, initiating recursive "
-                        "call ..... ".format(dependency))
-
-                if dependency in call_stack_order:
-                    raise CircularDependencyException("Circular dependency with"
-                        " item: {}".format(dependency))
-                else:
-                    call_stack_order.add(dependency)
-
-                # Rececursively call this function until we known all of the 
-                # possible dependencies
-                new_dependencies, known_dependencies, call_stack_order = \
-                    self._enhanced_list_dependencies(
-                        my_items=my_items, 
-                        item=dependency, 
-                        known_dependencies=known_dependencies,
-                        call_stack_order=call_stack_order,
-                        debug=debug
-                    ) 
-
-            if new_dependencies:
-
-                # Merge the existing and newly discovered dependencies
-                item_dependencies = list(set(
-                    item_dependencies + new_dependencies))
-
-        # When we have all of an item's dependencies, add them to the cache, and
-        # return the list of the item's dependencies
-        if debug:
-            print("& All dependencies for {} are known :) they are: ".\
-                    format(item), item_dependencies)
-        known_dependencies[item] = item_dependencies
-        return item_dependencies, known_dependencies, call_stack_order
+        graph = self._graph
+        items = graph.items
+        with self._phase("validation"):
+            missing, self_dependencies, duplicates, isolated = \
+                graph.edge_problems()
+        self._count("nodes_visited", graph.num_items)
+        self._count("edges_visited", graph.num_edges)
+        cycles = self.find_cycles()
+        return {
+            "valid": not missing and not cycles,
+            "missing_dependencies": [(items[i], items[j]) 
+                                     for i, j in missing],
+            "self_dependencies": [items[i] for i in self_dependencies],
+            "cycles": cycles,
+            "duplicate_dependencies": [(items[i], items[j]) 
+                                       for i, j in duplicates],
+            "isolated_items": [items[i] for i in isolated],
+        }
+    
+    
+    def _load_disk_cache(self):
+        """Return the DiskCache of the dependencies in self.cache_dir, looking 
+        it up the first time, or None if there is no cache directory, no cache
+        for these dependencies, or the items have changed since this object 
+        was created
+        """
+        if self._disk_cache is None:
+            self._disk_cache = False
+            if self.cache_dir is not None:
+                self._graph_digest = graph_digest(self._graph)
+                if self._graph_digest is not None:
+                    self._disk_cache = DiskCache.load(DiskCache.path(
+                        self.cache_dir, self._graph_digest)) or False
+                self._count("disk_cache_hits" if self._disk_cache 
+                            else "disk_cache_misses")
+        return self._disk_cache or None
+    
+    
+    def _save_disk_cache(self):
+        """Save the ordering, levels and complete dependencies to 
+        self.cache_dir, if the items haven't changed since this object was 
+        created
+        """
+        if self._graph_digest is None:
+            return
+        try:
+            DiskCache.save(DiskCache.path(self.cache_dir, self._graph_digest),
+                           self._cached_node_order(), self._graph.levels(), 
+                           self._known_dependencies)
+        except OSError:
+            
+            # The cache only saves time, so not being able to write it isn't 
+            # an error
+            pass
+    
+    
+    def _forget_disk_cache(self):
+        """Stop using the DiskCache, as the items have changed
+        """
+        self._disk_cache = False
+        self._graph_digest = None
     
     
-    def _complete_dependencies(self, debug=False):
+    def _complete_dependencies(self):
         """Take the input of partial dependencies, and complete it so that all 
         dependencies are flushed out. Here's an example:
         
@@ -227,37 +411,49 @@ class Dependencies(object):
         C isn't listed as a dependency of A, but it is, because A is dependent
         on B which is dependent on C, therefore (B, C) are dependencies for A.
         
-        Parameters
-        ----------
-        debug : bool (default of False)
-            Whether or not to print out statements helping for debugging as the 
-            _enhanced_list_dependencies method is called.
-            
         Returns
         -------
-        known_dependencies : dict
-            A dictionary of the same form as the input when initializing this 
-            class, but one that is complete, i.e., all dependencies for each 
-            item are listed out.
+        known_dependencies : SetClosure or BitsetClosure
+            A read-only mapping of the same form as the input when initializing
+            this class, but one that is complete, i.e., all dependencies for 
+            each item are listed out, see the closure module.
             
         """
-        if not self.dependencies_exist(verbose=True):
-            raise MissingDependencyException()
-            
-        for item in self.possible_items:
-            _, self._known_dependencies, _ = \
-                self._enhanced_list_dependencies(
-                    my_items=self.dependencies, 
-                    item=item, 
-                    known_dependencies=self._known_dependencies, 
-                    call_stack_order=set(), 
-                    debug=debug
-                )
+        self._count("closure_misses")
+        self._partial_dependencies = self._partial_nodes = None
+        closure_class = BitsetClosure if self.closure_mode == "bitset" \
+            else SetClosure
+        disk_cache = self._load_disk_cache()
+        if disk_cache is not None:
+            self._known_dependencies = closure_class.from_disk_cache(
+                self._graph, disk_cache)
+            return
+        
+        self._check_no_missing_dependencies()
+        
+        # Each item's row is the union of its dependencies' rows, so items are
+        # completed in an order where their dependencies are already complete
+        ordered_nodes = self._cached_node_order()
+        with self._phase("closure"):
+            self._known_dependencies = closure_class.from_order(
+                self._graph, ordered_nodes)
+        if self.stats is not None:
+            self.stats.count("nodes_visited", len(ordered_nodes))
+            self.stats.count("edges_visited", self._graph.num_edges)
+            self.stats.depth(len(self._graph.levels()))
+        self._save_disk_cache()
             
     
     def complete_dependencies(self, item):
         """Return the complete list of dependencies for item [item]
         
+        Unless the complete dependencies of every item have already been 
+        computed (see self.complete_dependencies_dict), only the items that 
+        [item] depends on are visited, and only those that weren't visited by 
+        an earlier call, so asking about a few items of a huge graph doesn't 
+        complete the whole graph. Missing and circular dependencies are only 
+        looked for among those items.
+        
         Parameters
         ----------
         item : str or int
@@ -269,9 +465,94 @@ class Dependencies(object):
             The complete list of dependencies for item [item]
             
         """
-        if self._known_dependencies == {}:
+        if self._known_dependencies is not None:
+            self._count("closure_hits")
+            return self._known_dependencies[item]
+        if self._load_disk_cache() is not None:
             self._complete_dependencies()
-        return self._known_dependencies[item]
+            return self._known_dependencies[item]
+        i = self._graph.node(item)
+        return self._complete_dependencies_of([i])[item]
+    
+    
+    def _complete_dependencies_of(self, nodes):
+        """Complete the dependencies of [nodes] only, along with those of the 
+        nodes that they depend on, reusing the rows of the nodes that have 
+        already been completed this way
+        
+        Returns
+        -------
+        partial_dependencies : SetClosure or BitsetClosure
+            The complete dependencies, where only the rows of the nodes in 
+            self._partial_nodes can be used
+            
+        """
+        graph = self._graph
+        if self._partial_dependencies is None:
+            closure_class = BitsetClosure if self.closure_mode == "bitset" \
+                else SetClosure
+            self._partial_dependencies = closure_class(graph)
+            self._partial_nodes = bytearray()
+        completed = self._partial_nodes
+        if len(completed) < graph.num_nodes:
+            completed.extend(bytes(graph.num_nodes - len(completed)))
+        
+        ordered_nodes = self._reachable_order(nodes, skip=completed)
+        if not ordered_nodes:
+            self._count("closure_hits")
+            return self._partial_dependencies
+        self._count("closure_misses")
+        with self._phase("closure"):
+            self._partial_dependencies.update(ordered_nodes)
+        for i in ordered_nodes:
+            completed[i] = 1
+        if self.stats is not None:
+            self.stats.count("nodes_visited", len(ordered_nodes))
+        return self._partial_dependencies
+    
+    
+    def _reachable_order(self, nodes, skip=None):
+        """Order [nodes] and the nodes that they depend on (not entering the 
+        nodes i whose skip[i] is set) such that they resolve, see 
+        CompactGraph.postorder, raising an exception if any of them have 
+        missing or circular dependencies
+        """
+        graph = self._graph
+        with self._phase("ordering"):
+            ordered_nodes, cycle = graph.postorder(nodes, skip)
+        if cycle is not None:
+            raise self._circular_dependency_exception(
+                [self._cycle_through(cycle)])
+        present = graph.present
+        for i in ordered_nodes:
+            if not present[i]:
+                dependent = next(j for j in ordered_nodes if present[j] and 
+                                 i in graph.dependencies_of(j))
+                raise MissingDependencyException(
+                    "Non-existant dependency: ({0}, {1})".format(
+                        graph.items[dependent], graph.items[i]))
+        return ordered_nodes
+    
+    
+    def _forget_partial_dependencies(self, i):
+        """Forget the complete dependencies of node [i] and of the nodes that
+        depend on it, if they were completed by self._complete_dependencies_of
+        """
+        completed = self._partial_nodes
+        if completed is None or i >= len(completed) or not completed[i]:
+            return
+        completed[i] = 0
+        
+        # The completed nodes' dependencies are all completed, so only the 
+        # dependents of completed nodes can be completed
+        dependents_of = self._graph.dependents_of
+        num_completed = len(completed)
+        stack = [i]
+        while stack:
+            for dependent in dependents_of(stack.pop()):
+                if dependent < num_completed and completed[dependent]:
+                    completed[dependent] = 0
+                    stack.append(dependent)
     
     
     def complete_dependencies_dict(self):
@@ -281,106 +562,1749 @@ class Dependencies(object):
         Returns
         -------
         complete_dependencies_dict : dict
-            Dict of items mapped to their complete list of dependencies
+            A dictionary of {item: complete list of dependencies}, built from 
+            self.complete_dependencies_closure
+            
+        """
+        return dict(self.complete_dependencies_closure())
+    
+    
+    def complete_dependencies_closure(self):
+        """Return the complete dependencies of every item without building a
+        list for each of them, see the closure module
+       
+        Returns
+        -------
+        complete_dependencies_closure : SetClosure or BitsetClosure
+            Read-only mapping of items to their complete list of dependencies,
+            which produces each list from the item's row when the item is 
+            looked up, and answers closure.depends_on(item, dependency) 
+            straight from the row
             
         """
-        if self._known_dependencies == {}:
+        if self._known_dependencies is None:
             self._complete_dependencies()
+        else:
+            self._count("closure_hits")
         return self._known_dependencies
         
     
-    def no_circular_dependencies(self):
-        """Check for no circular dependencies (automatically happens during 
-        self._enhanced_list_dependencies, so no real need to call this on
-        its own).
-        
-        Returns
-        -------
-        no_circular_dependencies : bool
-            True if no circular dependencies, otherwise False
+    def iter_complete_dependencies(self):
+        """Generate every item along with its complete list of dependencies, 
+        in an order such that the items resolve, without keeping the complete
+        dependencies of every item at once. Each item's complete dependencies 
+        are a bitset that is only kept until all of the items that directly 
+        depend on it have been generated, so only the items between the ones 
+        generated and the ones still to come are held in memory, which makes 
+        this suited to streaming the complete dependencies of a huge graph 
+        out to a file. Only the time spent computing the complete 
+        dependencies, and not the time between items, is counted in the 
+        "closure" phase of self.stats.
         
+        Yields
+        ------
+        item, dependencies : tuple
+            An item and its complete list of dependencies (in the order the 
+            items were added, see self.complete_dependencies), where items 
+            come in resolution order, each after all of its dependencies
+            
         """
+        order = self._cached_node_order()
+        graph = self._graph
+        items = graph.items
+        if self._known_dependencies is not None:
+            self._count("closure_hits")
+            for i in order:
+                yield items[i], self._known_dependencies[items[i]]
+            return
+        
+        # Timed in parts, around each yield, when there are stats
+        timed = self.stats is not None
+        if timed:
+            start_time = time.perf_counter()
+            seconds = 0.0
+            depths = array("i", [0]) * graph.num_nodes
+        dependencies_of = graph.dependencies_of
+        remaining_dependents = [0] * graph.num_nodes
+        for i in order:
+            for j in dependencies_of(i):
+                remaining_dependents[j] += 1
+        self._count("nodes_visited", len(order))
+        self._count("edges_visited", graph.num_edges)
+        rows = {}
         try:
-            self._complete_dependencies()
-            return True
-        except CircularDependencyException:
-            return False
+            for i in order:
+                row = 0
+                for j in dependencies_of(i):
+                    row |= rows[j] | (1 << j)
+                    remaining_dependents[j] -= 1
+                    if not remaining_dependents[j]:
+                        del rows[j]
+                if remaining_dependents[i]:
+                    rows[i] = row
+                complete_dependencies = \
+                    [items[j] for j in BitsetClosure.row_nodes(row)]
+                if timed:
+                    depths[i] = 1 + max(map(depths.__getitem__, 
+                                            dependencies_of(i)), default=0)
+                    seconds += time.perf_counter() - start_time
+                yield items[i], complete_dependencies
+                if timed:
+                    start_time = time.perf_counter()
+        finally:
+            if timed:
+                self.stats.add_seconds("closure", seconds)
+                self.stats.depth(max(depths, default=0))
         
     
-    def resolve_dependencies(self):
-        """Return a list of the dependencies in an order such that they resolve
-        successfully. Note that this is only ONE possible ordering, when there 
-        are potentially many possible orderings. Use this method if you only 
-        care about dependency resolution but don't necessarily care about the 
-        order in which dependencies resolve.
+    def _affected_nodes(self, nodes):
+        """Return [nodes] along with every node that depends on them, directly
+        or not, in the cached ordering of the nodes. This is one breadth-first
+        search over the direct dependents, taking time in proportion to the 
+        number of affected nodes and their dependents, and the result is 
+        cached (up to self.affected_cache_size results) until an item is 
+        added, removed or modified.
+        """
+        key = frozenset(nodes)
+        affected_nodes = self._affected_cache.get(key)
+        if affected_nodes is not None:
+            self._count("affected_cache_hits")
+        else:
+            self._count("affected_cache_misses")
+            dependents_of = self._graph.dependents_of
+            reached = set(key)
+            queue = deque(key)
+            num_edges = 0
+            while queue:
+                item_dependents = dependents_of(queue.popleft())
+                num_edges += len(item_dependents)
+                for dependent in item_dependents:
+                    if dependent not in reached:
+                        reached.add(dependent)
+                        queue.append(dependent)
+            self._count("nodes_visited", len(reached))
+            self._count("edges_visited", num_edges)
+            self._cached_node_order()
+            affected_nodes = array("i", sorted(
+                reached, key=self._order_positions.__getitem__))
+            if self.affected_cache_size:
+                if len(self._affected_cache) >= self.affected_cache_size:
+                    del self._affected_cache[next(iter(self._affected_cache))]
+                self._affected_cache[key] = affected_nodes
+        return affected_nodes
+    
+    
+    def depends_on(self, item, dependency):
+        """Whether [item] depends on [dependency], directly or not, without 
+        the complete dependencies. 
         
+        The first call labels every item with a few numbers in one O(V+E) 
+        pass, for V items and E dependencies, see the reachability module. 
+        Most questions are then answered from the labels of the two items 
+        alone, and the rest with a search of [item]'s dependencies that skips 
+        every item whose labels rule out [dependency]. The labels are kept 
+        until an item is added, removed or modified.
+        
+        Parameters
+        ----------
+        item, dependency : str or int
+            The items to check
+            
         Returns
         -------
-        ordered_dependencies : list
-            A list of the dependencies in an order such that they resolve 
-            successfully 
+        depends_on : bool
+            True if [item] depends on [dependency], otherwise False (including
+            when they are the same item)
+            
+        """
+        index = self._reachability()
+        return index.contains(self._graph.node(item), 
+                              self._graph.node(dependency))
+    
+    
+    def depends_on_many(self, pairs):
+        """Check many (item, dependency) [pairs] at once, see self.depends_on
         
+        Returns
+        -------
+        depends_on : list of bool
+            Whether each item depends on its dependency
+            
         """
-        if self._known_dependencies == {}:
-            self._complete_dependencies()
-        return list(self._known_dependencies.keys())
+        contains = self._reachability().contains
+        node = self._graph.node
+        return [contains(node(item), node(dependency)) 
+                for item, dependency in pairs]
     
     
-    def _check_if_ordering_is_correct(self, ordering):
-        """Given an [ordering] of items and a complete dictionary of items to 
-        their dependencies [known_dependencies], check to see if the ordering 
-        is correct from a dependency management perspective or not.
+    def _reachability(self):
+        """Return the ReachabilityIndex of the items, building it if needed
         """
-        if self._known_dependencies == {}:
-            self._complete_dependencies()
-        items_already_looped_through = set()
-        for item in ordering:
-            items_already_looped_through.add(item)
-            # Loop through each item's complete set of dependencies, if any of 
-            # those dependencies haven't already been looped through, then the 
-            # ordering is incorrect!
-            for item_dependency in self._known_dependencies[item]:
-                if item_dependency not in items_already_looped_through:
-                    return False
-        return True
+        if self._reachability_index is None:
+            order = self._cached_node_order()
+            with self._phase("reachability"):
+                self._reachability_index = ReachabilityIndex.from_graph(
+                    self._graph, order)
+            self._count("nodes_visited", len(order))
+            self._count("edges_visited", self._graph.num_edges)
+        return self._reachability_index
     
     
-    def all_possible_resolution_orders(self, verbose=False):
-        """Instead of returning one correct ordering of the input items that 
-        successfully resolves their depedencies, return ALL possible orderings. 
-        This is a "naive" approach with horrible runtime complexity because it 
-        loops through every possible ordering and checks to see whether or not 
-        that ordering is correct. I'm working on the "non-naive" approach...
+    def dependents(self, item, transitive=True):
+        """Return the items that depend on item [item], i.e., the items that 
+        have to be redone if [item] changes. This is the reverse of 
+        self.complete_dependencies, answered from the index of direct 
+        dependents instead of by scanning every item's complete dependencies.
         
         Parameters
         ----------
-        verbose : bool (default of False)
-            Prints out the # of permutations and # of correct vs. incorrect 
-            orderings ("correct" means the dependencies are successfully 
-            resolved)
+        item : str or int
+            The item to return the dependents of
+            
+        transitive : bool (default of True)
+            If True, return every item that depends on [item] directly or not,
+            in an order such that they resolve successfully (see 
+            self.affected_by), otherwise only the items that directly depend 
+            on [item], in the order they were added
+            
+        Returns
+        -------
+        dependents : list
+            The items that depend on item [item]
+            
+        """
+        graph = self._graph
+        i = graph.node(item)
+        if transitive:
+            nodes = self._affected_nodes((i,))[1:]
+        else:
+            nodes = sorted(graph.dependents_of(i))
+        return [graph.items[j] for j in nodes]
+    
+    
+    def affected_by(self, changed_items):
+        """Return the smallest set of items to redo when [changed_items] 
+        change: the changed items themselves and every item that depends on 
+        any of them, directly or not, in an order such that they resolve 
+        successfully (a subsequence of self.resolve_dependencies).
         
+        Parameters
+        ----------
+        changed_items : iterable
+            The items that changed
+            
         Returns
         -------
-        all_possible_orderings : list of lists
-            List of lists, each sublist is a possible ordering of the items that
-            successfully resolves all dependencies
+        affected_items : list
+            The items to redo, in an order such that they resolve successfully
+            
+        """
+        graph = self._graph
+        nodes = [graph.node(item) for item in changed_items]
+        return [graph.items[i] for i in self._affected_nodes(nodes)]
+    
+    
+    def transitive_reduction(self, report_redundant=False):
+        """Return the fewest dependencies that still say the same thing: a 
+        direct dependency is redundant when the item already depends on it 
+        through one of its other direct dependencies (ex. if A depends on B 
+        and C, and B depends on C, then A's dependency on C is redundant), or 
+        when it is listed more than once. Items resolve in exactly the same 
+        orders without the redundant dependencies.
+        
+        For each item, the complete dependencies of its direct dependencies 
+        are unioned, and a direct dependency is redundant if it is in the 
+        union. If the complete dependencies have already been computed, they 
+        are used as they are. Otherwise they are computed as bitsets, one item
+        at a time in the cached ordering, and each item's bitset is dropped as
+        soon as the last item that directly depends on it has been reduced, so
+        only the bitsets of the items in between are ever held in memory.
         
+        Parameters
+        ----------
+        report_redundant : bool (default of False)
+            Whether to also return the redundant dependencies
+            
+        Returns
+        -------
+        reduced_dependencies : dict
+            A dictionary of {item: list of items that this item depends on, in
+            their original order, without the redundant ones}
+            
+        redundant_dependencies : list of tuples
+            Only if [report_redundant], an (item, dependency) pair for every 
+            redundant dependency that was removed, in the order of the items
+            
         """
-        incorrect_orderings = []
-        correct_orderings = []
+        graph = self._graph
+        items = graph.items
+        unique_dependencies = {i: list(dict.fromkeys(graph.dependencies_of(i)))
+                               for i in graph.nodes()}
+        closure = self._known_dependencies
+        if closure is not None:
+            self._count("closure_hits")
+            redundant_of = {
+                i: closure.redundant_dependencies(dependencies) 
+                for i, dependencies in unique_dependencies.items() 
+                if len(dependencies) > 1}
+        else:
+            redundant_of = self._redundant_dependencies(unique_dependencies)
         
-        for my_items_perm in list(permutations(self.possible_items)):
-            if self._check_if_ordering_is_correct(my_items_perm):
-                correct_orderings.append(my_items_perm)
-            else:
-                incorrect_orderings.append(my_items_perm)
-                
-        if verbose:
-            num_correct_orderings, num_incorrect_orderings = \
-                len(correct_orderings), len(incorrect_orderings)
-            print("Number of permutations:", 
-                num_correct_orderings + num_incorrect_orderings)
-            print("Number of correct orderings:", num_correct_orderings)
-            print("Number of incorrect orderings:", num_incorrect_orderings)
+        reduced_dependencies = {}
+        redundant_dependencies = []
+        for i, dependencies in unique_dependencies.items():
+            redundant = redundant_of.get(i, ())
+            reduced_dependencies[items[i]] = [
+                items[j] for j in dependencies if j not in redundant]
+            if report_redundant and len(reduced_dependencies[items[i]]) < \
+                    len(graph.dependencies_of(i)):
+                kept = set()
+                for j in graph.dependencies_of(i):
+                    if j in redundant or j in kept:
+                        redundant_dependencies.append((items[i], items[j]))
+                    else:
+                        kept.add(j)
+        if report_redundant:
+            return reduced_dependencies, redundant_dependencies
+        return reduced_dependencies
+    
+    
+    def no_circular_dependencies(self):
+        """Check for no circular dependencies (automatically happens when 
+        completing or ordering the dependencies, so no real need to call this 
+        on its own). See self.find_cycles to list them.
+        
+        Returns
+        -------
+        no_circular_dependencies : bool
+            True if no circular dependencies, otherwise False
+        
+        """
+        return not self.find_cycles()
+    
+    
+    def find_cycles(self):
+        """Find every circular dependency in one O(V+E) pass, for V items and E 
+        dependencies, instead of stopping at the first one.
+        
+        Each strongly connected component with more than one item (the largest
+        groups of items that all depend on each other, found with Tarjan's 
+        algorithm, see CompactGraph.strongly_connected_components), and each 
+        item that depends on itself, is reported along with a concrete cycle 
+        through it: a shortest chain of dependencies from its first item back 
+        to that item.
+        
+        Returns
+        -------
+        cycles : list of dicts
+            One {"items": list of items in the component, "cycle": [item, 
+            item's dependency, ..., item]} dict per circular dependency, with 
+            items in the order they were given in. Empty when there are no 
+            circular dependencies.
             
-        return correct_orderings
+        """
+        graph = self._graph
+        cycles = []
+        with self._phase("cycles"):
+            components = graph.strongly_connected_components()
+        self._count("nodes_visited", graph.num_items)
+        self._count("edges_visited", graph.num_edges)
+        for component in components:
+            first_node = min(component)
+            if len(component) == 1 and \
+                    first_node not in graph.dependencies_of(first_node):
+                continue
+            component.sort()
+            if first_node in graph.dependencies_of(first_node):
+                cycle = [first_node, first_node]
+            else:
+                cycle = [first_node] + graph.shortest_path(
+                    graph.dependencies_of(first_node), first_node, 
+                    within=set(component))
+            cycles.append((component, cycle))
+        cycles.sort(key=lambda cycle: cycle[0][0])
+        items = graph.items
+        return [{"items": [items[i] for i in component], 
+                 "cycle": [items[i] for i in cycle]} 
+                for component, cycle in cycles]
+    
+    
+    def _circular_dependency_exception(self, cycles=None):
+        """Create the exception for circular dependencies, listing [cycles] 
+        (in the form of self.find_cycles), or all of them when None
+        """
+        if cycles is None:
+            cycles = self.find_cycles()
+        return CircularDependencyException(
+            "Circular dependencies: {}".format("; ".join(
+                " -> ".join(str(item) for item in cycle["cycle"]) 
+                for cycle in cycles)), 
+            cycles=cycles)
+    
+    
+    def _cycle_through(self, path):
+        """The cycle, in the form of self.find_cycles, that closes the chain of
+        dependencies [path] (a list of nodes) back onto its first node
+        """
+        items = self._graph.items
+        cycle = [items[i] for i in path] + [items[path[0]]]
+        return {"items": cycle[:-1], "cycle": cycle}
+    
+    
+    def _check_no_missing_dependencies(self):
+        """Raise an exception naming the first dependency that isn't an item, 
+        if there is one
+        """
+        with self._phase("validation"):
+            missing_dependencies = self._graph.missing_dependencies()
+        if missing_dependencies:
+            i, j = missing_dependencies[0]
+            raise MissingDependencyException("Non-existant dependency: "
+                "({0}, {1})".format(self._graph.items[i], self._graph.items[j]))
+    
+    
+    def _node_order(self, priority=None):
+        """Order the nodes of the items such that they resolve successfully, 
+        using Kahn's algorithm, see self.resolve_dependencies and 
+        CompactGraph.topological_order
+        """
+        self._check_no_missing_dependencies()
+        with self._phase("ordering"):
+            order = self._graph.topological_order(priority)
+        self._count("nodes_visited", len(order))
+        self._count("edges_visited", self._graph.num_edges)
+        self._check_all_resolved(len(order))
+        return order
+    
+    
+    def _check_all_resolved(self, num_resolved):
+        """Raise an exception if Kahn's algorithm only resolved [num_resolved]
+        items, as the items on a circular dependency never run out of 
+        dependencies
+        """
+        if num_resolved < self._graph.num_items:
+            raise self._circular_dependency_exception()
+    
+    
+    def _cached_node_order(self):
+        """Return the cached ordering of the nodes of the items, computing it 
+        if needed, as an array without any removed items
+        """
+        if self._order is None or len(self._order) > self._graph.num_items:
+            if self._order is None:
+                disk_cache = self._load_disk_cache()
+                self._order = disk_cache.order_array() if disk_cache \
+                    else array("i", self._node_order())
+            else:
+                
+                # Drop the placeholders of items that have been removed
+                self._order = array("i", (i for i in self._order if i >= 0))
+            positions = array("i", [-1]) * self._graph.num_nodes
+            for position, i in enumerate(self._order):
+                positions[i] = position
+            self._order_positions = positions
+        return self._order
+    
+    
+    def resolve_dependencies(self, key=None):
+        """Return a list of the dependencies in an order such that they resolve
+        successfully. Note that this is only ONE possible ordering, when there 
+        are potentially many possible orderings. Use this method if you only 
+        care about dependency resolution but don't necessarily care about the 
+        order in which dependencies resolve.
+        
+        This is Kahn's algorithm run directly on the graph of dependencies, so 
+        it takes O(V+E) time for V items and E dependencies (O((V+E) log V) 
+        when [key] is given) and doesn't need the complete dependencies. 
+        Whenever several items are ready to resolve at the same time, the tie 
+        is broken deterministically: by [key] if given, and otherwise by the 
+        order of the items in the dictionary passed to this class.
+        
+        Without [key], the ordering is cached, and items that are added, 
+        removed or modified afterwards (see self.add_item) only move the items 
+        that they have to, so the ordering stays as stable as possible.
+        
+        Parameters
+        ----------
+        key : callable (default of None)
+            Optional function of one item returning a priority for that item, 
+            items that are ready at the same time resolve in ascending order of
+            priority (ties broken by the input order of the items)
+        
+        Returns
+        -------
+        ordered_dependencies : list
+            A list of the dependencies in an order such that they resolve 
+            successfully 
+        
+        """
+        items = self._graph.items
+        if key is not None:
+            return [items[i] for i 
+                    in self._node_order(lambda i: key(items[i]))]
+        return [items[i] for i in self._cached_node_order()]
+    
+    
+    def resolve_for(self, targets):
+        """Return [targets] and every item that they depend on, directly or 
+        not, in an order such that they resolve successfully. Only those items
+        are visited, with a depth-first search from each target in turn, so 
+        this takes time in proportion to the part of the graph that the 
+        targets need rather than to the whole graph.
+        
+        Parameters
+        ----------
+        targets : iterable
+            The items to resolve
+            
+        Returns
+        -------
+        ordered_dependencies : list
+            The targets and their complete dependencies, each after all of its
+            dependencies
+        
+        """
+        graph = self._graph
+        nodes = [graph.node(target) for target in targets]
+        items = graph.items
+        return [items[i] for i in self._reachable_order(nodes)]
+    
+    
+    def resolve_levels(self):
+        """Group the items into levels (or waves), such that every item only 
+        depends on items in earlier levels. All of the items in a level can 
+        therefore resolve at the same time, once the previous levels have, and
+        the number of levels is the length of the longest chain of 
+        dependencies.
+        
+        This is Kahn's algorithm run one level at a time: the first level is 
+        the items without dependencies, and each following level is the items 
+        whose last remaining dependency was in the previous level. It takes 
+        O(V+E) time for V items and E dependencies, and doesn't need the 
+        complete dependencies.
+        
+        Returns
+        -------
+        levels : list of lists
+            The items, level by level. Within a level, items are in a 
+            deterministic order starting from the input order of the items.
+        
+        """
+        disk_cache = self._load_disk_cache()
+        if disk_cache is not None:
+            node_levels = disk_cache.levels()
+        else:
+            self._check_no_missing_dependencies()
+            with self._phase("ordering"):
+                node_levels = self._graph.levels()
+            self._count("nodes_visited", sum(map(len, node_levels)))
+            self._count("edges_visited", self._graph.num_edges)
+            self._check_all_resolved(sum(map(len, node_levels)))
+        if self.stats is not None:
+            self.stats.depth(len(node_levels))
+        items = self._graph.items
+        return [[items[i] for i in level] for level in node_levels]
+    
+    
+    def is_correct_ordering(self, ordering):
+        """Check if an [ordering] of items resolves their dependencies: every 
+        item in it has to come after all of its direct dependencies, which 
+        then also holds for all of its complete dependencies. Each item's 
+        position is looked up once, so this takes O(V+E) time for V items and
+        E dependencies, without needing the complete dependencies. 
+        
+        An ordering can leave out items as long as it leaves out everything 
+        that depends on them too. If an item is repeated, its first position 
+        counts.
+        
+        Parameters
+        ----------
+        ordering : iterable
+            The items, in the order to check
+            
+        Returns
+        -------
+        is_correct : bool
+            True if the items resolve in that order, otherwise False
+        
+        """
+        return self.check_orderings([ordering])[0]
+    
+    
+    def check_orderings(self, orderings, use_numpy=None):
+        """Check many [orderings] of items at once, see 
+        self.is_correct_ordering. 
+        
+        Every dependency is listed once as a pair of arrays (of items and of 
+        their dependencies), and an ordering is correct if the position of 
+        each dependency is lower than the position of its item. With NumPy, 
+        orderings are checked in batches: the positions of the items in each 
+        ordering of a batch are the rows of a matrix, and every dependency is 
+        compared across all of the rows at once.
+        
+        Parameters
+        ----------
+        orderings : iterable of iterables
+            The orderings to check
+            
+        use_numpy : bool (default of None)
+            Whether to check batches of orderings with NumPy, by default 
+            whenever NumPy is installed
+            
+        Returns
+        -------
+        are_correct : list of bool
+            Whether each ordering resolves the items
+        
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        assert not use_numpy or numpy is not None, \
+            "use_numpy requires NumPy to be installed"
+        self._check_no_missing_dependencies()
+        graph = self._graph
+        graph.compact()
+        offsets, dependency_nodes = graph.forward.offsets, graph.forward.targets
+        num_nodes = graph.num_nodes
+        if not use_numpy:
+            item_nodes = array("i")
+            for i in graph.nodes():
+                item_nodes.extend([i] * (offsets[i + 1] - offsets[i]))
+            return [self._nodes_are_ordered(self._ordering_nodes(ordering), 
+                                            item_nodes, dependency_nodes) 
+                    for ordering in orderings]
+        
+        # Positions are int32, with items left out of an ordering at the 
+        # largest int32, past any position that repeated items can reach, so a
+        # dependency that is left out never counts as coming first. A batch 
+        # holds a matrix of positions per node and two per dependency, along 
+        # with three boolean arrays per dependency, so with at most 2 ** 22 
+        # rows times the larger of the number of nodes and of dependencies, a 
+        # batch takes up to about 64MB
+        dependency_nodes = numpy.frombuffer(dependency_nodes, dtype=numpy.int32)
+        item_nodes = numpy.repeat(numpy.arange(num_nodes, dtype=numpy.int32), 
+                                  numpy.diff(numpy.frombuffer(
+                                      offsets, dtype=numpy.int32)))
+        batch_size = max(1, 2 ** 22 // max(num_nodes, len(item_nodes), 1))
+        left_out = numpy.iinfo(numpy.int32).max
+        orderings = iter(orderings)
+        are_correct = []
+        while True:
+            batch = [self._ordering_nodes(ordering) for _, ordering 
+                     in zip(range(batch_size), orderings)]
+            if not batch:
+                return are_correct
+            matrix = numpy.full((len(batch), num_nodes), left_out, 
+                                dtype=numpy.int32)
+            for row, nodes in zip(matrix, batch):
+                nodes, first_positions = numpy.unique(
+                    numpy.array(nodes, dtype=numpy.int32), return_index=True)
+                row[nodes] = first_positions
+            item_positions = matrix[:, item_nodes]
+            are_correct.extend(numpy.all(
+                (matrix[:, dependency_nodes] < item_positions) | 
+                (item_positions == left_out), axis=1).tolist())
+    
+    
+    def _ordering_nodes(self, ordering):
+        """Return the nodes of the items in [ordering], as a list
+        """
+        try:
+            return list(map(self._graph.index.__getitem__, ordering))
+        except KeyError:
+            return [self._graph.node(item) for item in ordering]
+    
+    
+    def _nodes_are_ordered(self, nodes, item_nodes, dependency_nodes):
+        """Whether every node in the list [nodes] comes after all of its 
+        direct dependencies, given every dependency as a pair of arrays of 
+        [item_nodes] and [dependency_nodes]
+        """
+        graph = self._graph
+        if len(nodes) == graph.num_items == len(set(nodes)):
+            positions = array("i", [0]) * graph.num_nodes
+            for position, i in enumerate(nodes):
+                positions[i] = position
+            get_position = positions.__getitem__
+            return all(map(lt, map(get_position, dependency_nodes), 
+                           map(get_position, item_nodes)))
+        
+        # Some items are left out or repeated
+        positions = dict(zip(reversed(nodes), range(len(nodes) - 1, -1, -1)))
+        offsets, targets = graph.forward.offsets, graph.forward.targets
+        for i, position in positions.items():
+            for j in targets[offsets[i]:offsets[i + 1]]:
+                if positions.get(j, position) >= position:
+                    return False
+        return True
+    
+    
+    def iter_resolution_orders(self, limit=None):
+        """Lazily generate every possible ordering of the items that 
+        successfully resolves their dependencies.
+        
+        This is the Varol-Rotem algorithm (Algorithm V in Knuth's TAOCP 
+        7.2.1.2). Items are labelled 1..n in the order returned by 
+        self.resolve_dependencies, and every other ordering is reached from the 
+        previous one by moving the highest label that can still move one 
+        position to the left. Two adjacent items can only be swapped when 
+        neither directly depends on the other, so each step is a set lookup 
+        on the direct dependencies, and nothing but the current ordering is 
+        kept in memory.
+        
+        Parameters
+        ----------
+        limit : int (default of None)
+            Stop after generating this many orderings, when None generate all
+            of them
+        
+        Yields
+        ------
+        ordering : tuple
+            A possible ordering of the items that successfully resolves all 
+            dependencies
+        
+        """
+        if limit is not None and limit <= 0:
+            return
+        
+        # Label the items 1..n, with the position 0 holding a sentinel that 
+        # nothing can move past
+        graph = self._graph
+        ordered_nodes = self._cached_node_order()
+        labelled_items = [None] + [graph.items[i] for i in ordered_nodes]
+        labels = array("i", [0]) * graph.num_nodes
+        for label, i in enumerate(ordered_nodes, 1):
+            labels[i] = label
+        direct_dependencies = [set()] + [
+            {labels[j] for j in graph.dependencies_of(i)} 
+            for i in ordered_nodes]
+        num_items = len(labelled_items) - 1
+        ordering = list(range(num_items + 1))   # a in Knuth's notation
+        positions = list(range(num_items + 1))  # a' in Knuth's notation
+        
+        num_generated = 0
+        while True:
+            yield tuple(labelled_items[label] for label in ordering[1:])
+            num_generated += 1
+            if limit is not None and num_generated >= limit:
+                return
+            
+            label = num_items
+            while label > 0:
+                
+                # Can this label move one position to the left?
+                position = positions[label]
+                left_label = ordering[position - 1]
+                if left_label != 0 and \
+                        left_label not in direct_dependencies[label]:
+                    ordering[position - 1] = label
+                    ordering[position] = left_label
+                    positions[label] = position - 1
+                    positions[left_label] = position
+                    break
+                
+                # It can't, so put it back where it started and try the next 
+                # highest label
+                while position < label:
+                    left_label = ordering[position + 1]
+                    ordering[position] = left_label
+                    positions[left_label] = position
+                    position += 1
+                ordering[label] = label
+                positions[label] = label
+                label -= 1
+            else:
+                return
+    
+    
+    def all_possible_resolution_orders(self, verbose=False):
+        """Instead of returning one correct ordering of the input items that 
+        successfully resolves their depedencies, return ALL possible orderings. 
+        See self.iter_resolution_orders, which generates the orderings one at a
+        time, for how they are generated.
+        
+        Parameters
+        ----------
+        verbose : bool (default of False)
+            Prints out the # of correct orderings ("correct" means the 
+            dependencies are successfully resolved)
+        
+        Returns
+        -------
+        all_possible_orderings : list of tuples
+            List of tuples, each tuple is a possible ordering of the items that
+            successfully resolves all dependencies
+        
+        """
+        correct_orderings = list(self.iter_resolution_orders())
+                
+        if verbose:
+            print("Number of correct orderings:", len(correct_orderings))
+            
+        return correct_orderings
+    
+    
+    @staticmethod
+    def _count_linear_extensions(dependency_masks):
+        """Count the orderings of each set of items that can be resolved first.
+        
+        Items are numbered 0..n-1 and a set of items is a bitmask. A set of 
+        items can be resolved first (i.e., it is a frontier of some correct 
+        ordering) when it contains all of the dependencies of its items. The 
+        number of ways to order a frontier is the sum, over the items in it 
+        that are ready to go last, of the number of ways to order the frontier 
+        without that item. Frontiers are built up one item at a time, so the 
+        sum is computed with dynamic programming instead of enumeration.
+        
+        Parameters
+        ----------
+        dependency_masks : list of int
+            For each item, the bitmask of the items that it directly depends on
+            
+        Returns
+        -------
+        ways : dict
+            A dictionary of {frontier bitmask: number of correct orderings of 
+            the items in the frontier}, for every frontier
+            
+        """
+        ways = {0: 1}
+        frontiers = [0]
+        for _ in range(len(dependency_masks)):
+            next_ways = {}
+            for frontier in frontiers:
+                frontier_ways = ways[frontier]
+                for i, dependency_mask in enumerate(dependency_masks):
+                    item_bit = 1 << i
+                    if not frontier & item_bit and \
+                            not dependency_mask & ~frontier:
+                        next_frontier = frontier | item_bit
+                        next_ways[next_frontier] = \
+                            next_ways.get(next_frontier, 0) + frontier_ways
+            ways.update(next_ways)
+            frontiers = list(next_ways)
+        return ways
+    
+    
+    def _resolution_order_components(self):
+        """Split the items into groups that don't depend on each other in any 
+        way (the weakly connected components of the dependency graph), and 
+        count the correct orderings within each group. The result is cached, 
+        as it is shared by self.count_resolution_orders and 
+        self.sample_resolution_order.
+        
+        Returns
+        -------
+        components : list of tuples
+            One (items, dependency masks, dependent masks, ways) tuple per 
+            group, where items are in an order that resolves their 
+            dependencies, bitmasks are over the positions of the items in that
+            order, and ways comes from self._count_linear_extensions
+            
+        """
+        if self._resolution_order_components_cache is not None:
+            return self._resolution_order_components_cache
+        
+        graph = self._graph
+        ordered_nodes = self._cached_node_order()
+        
+        # Union-find over the direct dependencies
+        parents = array("i", range(graph.num_nodes))
+        
+        def find(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+        
+        for i in ordered_nodes:
+            for j in graph.dependencies_of(i):
+                root, dependency_root = find(i), find(j)
+                if root != dependency_root:
+                    parents[root] = dependency_root
+        groups = {}
+        for i in ordered_nodes:
+            groups.setdefault(find(i), []).append(i)
+        
+        components = []
+        for group in groups.values():
+            local_positions = {i: local_i for local_i, i in enumerate(group)}
+            dependency_masks = []
+            dependent_masks = [0] * len(group)
+            for local_i, i in enumerate(group):
+                dependency_mask = 0
+                for j in graph.dependencies_of(i):
+                    local_dependency = local_positions[j]
+                    dependency_mask |= 1 << local_dependency
+                    dependent_masks[local_dependency] |= 1 << local_i
+                dependency_masks.append(dependency_mask)
+            components.append(([graph.items[i] for i in group], 
+                               dependency_masks, dependent_masks, 
+                               self._count_linear_extensions(dependency_masks)))
+        
+        self._resolution_order_components_cache = components
+        return components
+    
+    
+    def count_resolution_orders(self):
+        """Count the possible orderings of the items that successfully resolve 
+        their dependencies, without generating them.
+        
+        The correct orderings of each group of items that don't depend on each 
+        other are counted separately (see self._count_linear_extensions), and 
+        any interleaving of the groups' orderings is also correct, so the total
+        is the product of the groups' counts times the number of ways to 
+        interleave groups of those sizes.
+        
+        Returns
+        -------
+        num_orderings : int
+            The number of possible orderings that resolve all dependencies
+            
+        """
+        components = self._resolution_order_components()
+        num_orderings = factorial(sum(len(items) for items, _, _, _ 
+                                      in components))
+        for items, _, _, _ in components:
+            num_orderings //= factorial(len(items))
+        for items, _, _, ways in components:
+            num_orderings *= ways[(1 << len(items)) - 1]
+        return num_orderings
+    
+    
+    def sample_resolution_order(self, rng=None):
+        """Draw one of the possible orderings of the items that successfully 
+        resolve their dependencies, uniformly at random.
+        
+        Each group of items that don't depend on each other is ordered back to
+        front: out of the items that no remaining item depends on, an item is 
+        chosen to go last with probability proportional to the number of 
+        correct orderings of the remaining items (see 
+        self._count_linear_extensions). The groups' orderings are then 
+        interleaved with a random shuffle.
+        
+        Parameters
+        ----------
+        rng : random.Random or int (default of None)
+            The random number generator to use, or a seed for a new one. When 
+            None, the random module's global generator is used.
+            
+        Returns
+        -------
+        ordering : tuple
+            A possible ordering of the items that resolves all dependencies
+            
+        """
+        if rng is None:
+            rng = random
+        elif isinstance(rng, int):
+            rng = random.Random(rng)
+        
+        component_orderings = []
+        interleaving = []
+        for component_i, (items, _, dependent_masks, ways) in \
+                enumerate(self._resolution_order_components()):
+            frontier = (1 << len(items)) - 1
+            reversed_ordering = []
+            while frontier:
+                choice = rng.randrange(ways[frontier])
+                for i, dependent_mask in enumerate(dependent_masks):
+                    item_bit = 1 << i
+                    if frontier & item_bit and not dependent_mask & frontier:
+                        choice -= ways[frontier ^ item_bit]
+                        if choice < 0:
+                            break
+                reversed_ordering.append(items[i])
+                frontier ^= item_bit
+            component_orderings.append(reversed_ordering)
+            interleaving.extend([component_i] * len(items))
+        
+        rng.shuffle(interleaving)
+        return tuple(component_orderings[component_i].pop() 
+                     for component_i in interleaving)
+    
+    
+    def _check_new_dependencies(self, item, dependencies):
+        """Raise an exception if [item] can't depend on [dependencies] because 
+        one of them doesn't exist or is [item] itself
+        """
+        for dependency in dependencies:
+            if dependency == item:
+                raise self._circular_dependency_exception(
+                    [{"items": [item], "cycle": [item, item]}])
+            if dependency not in self.dependencies:
+                raise MissingDependencyException("Non-existant dependency: "
+                    "({0}, {1})".format(item, dependency))
+    
+    
+    def _reachable_within(self, i, adjacency, lowest, highest):
+        """Return node [i] along with the nodes reachable from it through 
+        [adjacency] (either CompactGraph.dependencies_of or 
+        CompactGraph.dependents_of) whose positions in the cached ordering are
+        between [lowest] and [highest]
+        """
+        positions = self._order_positions
+        reached = {i}
+        stack = [i]
+        while stack:
+            for j in adjacency(stack.pop()):
+                if j not in reached and lowest <= positions[j] <= highest:
+                    reached.add(j)
+                    stack.append(j)
+        return reached
+    
+    
+    def _redundant_dependencies(self, unique_dependencies):
+        """Return a dictionary of {node: set of its direct dependencies that 
+        another one of them depends on}, for the nodes that have any, given 
+        the {node: list of its unique direct dependencies} of every item. The 
+        complete dependencies of each node are a bitset that is only kept 
+        until all of the nodes that directly depend on it have been visited.
+        """
+        order = self._cached_node_order()
+        remaining_dependents = [0] * self._graph.num_nodes
+        for dependencies in unique_dependencies.values():
+            for j in dependencies:
+                remaining_dependents[j] += 1
+        rows = {}
+        redundant_of = {}
+        for i in order:
+            covered = 0
+            for j in unique_dependencies[i]:
+                covered |= rows[j]
+            dependencies = unique_dependencies[i]
+            if len(dependencies) > 1:
+                redundant = {j for j in dependencies if covered >> j & 1}
+                if redundant:
+                    redundant_of[i] = redundant
+            for j in dependencies:
+                covered |= 1 << j
+                remaining_dependents[j] -= 1
+                if not remaining_dependents[j]:
+                    del rows[j]
+            if remaining_dependents[i]:
+                rows[i] = covered
+        return redundant_of
+    
+    
+    def _reorder_for_dependency(self, i, j):
+        """Fix the cached ordering before node [i] gets a new direct dependency
+        on node [j], using the Pearce-Kelly dynamic topological sort.
+        
+        Nothing needs to move if [j] already comes before [i]. Otherwise only 
+        the nodes between the two are affected: the ones that depend on [i] 
+        have to move after the ones that [j] depends on, and they swap places 
+        among the positions they already occupy. Reaching [j] from [i] means 
+        that the new dependency would be circular.
+        """
+        graph = self._graph
+        positions = self._order_positions
+        lowest, highest = positions[i], positions[j]
+        if highest < lowest:
+            return
+        
+        dependents = self._reachable_within(
+            i, graph.dependents_of, lowest, highest)
+        if j in dependents:
+            raise self._circular_dependency_exception(
+                [self._cycle_through([i] + graph.shortest_path([j], i)[:-1])])
+        dependencies = self._reachable_within(
+            j, graph.dependencies_of, lowest, highest)
+        
+        moved_nodes = sorted(dependencies, key=positions.__getitem__) + \
+            sorted(dependents, key=positions.__getitem__)
+        free_positions = sorted(positions[moved] for moved in moved_nodes)
+        for position, moved in zip(free_positions, moved_nodes):
+            self._order[position] = moved
+            positions[moved] = position
+    
+    
+    def _order_subset(self, nodes):
+        """Order a set of [nodes] such that every node comes after those of its
+        dependencies that are also in [nodes], using Kahn's algorithm on the 
+        nodes and their direct dependencies only
+        """
+        graph = self._graph
+        in_degrees = {i: sum(j in nodes for j in graph.dependencies_of(i)) 
+                      for i in nodes}
+        ready = [i for i in nodes if in_degrees[i] == 0]
+        ordered_nodes = []
+        while ready:
+            i = ready.pop()
+            ordered_nodes.append(i)
+            for dependent in graph.dependents_of(i):
+                if dependent in in_degrees:
+                    in_degrees[dependent] -= 1
+                    if in_degrees[dependent] == 0:
+                        ready.append(dependent)
+        return ordered_nodes
+    
+    
+    def _update_complete_dependencies(self, i):
+        """Recompute the cached complete dependencies of node [i] and of every 
+        node that depends on it, and only those.
+        """
+        dependents_of = self._graph.dependents_of
+        affected_nodes = {i}
+        stack = [i]
+        while stack:
+            for dependent in dependents_of(stack.pop()):
+                if dependent not in affected_nodes:
+                    affected_nodes.add(dependent)
+                    stack.append(dependent)
+        self._known_dependencies.update(self._order_subset(affected_nodes))
+        self._count("closure_updates", len(affected_nodes))
+    
+    
+    def freeze(self, complete=False):
+        """Return an immutable snapshot of the items, see FrozenDependencies.
+        This object is left as it is, and can still be changed. The snapshot 
+        has its own stats, so its queries aren't counted here.
+        
+        Parameters
+        ----------
+        complete : bool (default of False)
+            Whether the snapshot should also hold the complete dependencies of
+            every item, which it does anyway if they have already been 
+            computed here. They can take O(V^2) memory for V items.
+            
+        """
+        frozen = self._copy(FrozenDependencies)
+        frozen._precompute(complete)
+        return frozen
+    
+    
+    def _copy(self, cls):
+        """Return a new [cls] object with a copy of the items, along with the 
+        cached ordering and complete dependencies if there are any, which can 
+        be changed without affecting this object. The copy counts into a new 
+        Stats object, with the same callback, if this object has one.
+        """
+        copied = cls.__new__(cls)
+        stats = None if self.stats is None else Stats(self.stats.callback)
+        Dependencies.__init__(copied, closure_mode=self.closure_mode, 
+                              stats=stats)
+        copied._graph = self._graph.copy()
+        if self._order is not None:
+            copied._order = array("i", self._order)
+            copied._order_positions = array("i", self._order_positions)
+        if self._known_dependencies is not None:
+            copied._known_dependencies = self._known_dependencies.copy(
+                copied._graph)
+        return copied
+    
+    
+    def add_item(self, item, dependencies=()):
+        """Add a new item, along with the items that it depends on. 
+        
+        The cached ordering, complete dependencies and index of dependents are 
+        updated in place instead of being recomputed, so this only takes time 
+        in proportion to the new item's dependencies.
+        
+        Parameters
+        ----------
+        item : str or int
+            The item to add
+            
+        dependencies : list (default of an empty tuple)
+            The items that [item] depends on, which must already exist, and 
+            must not depend on [item] if it was a missing dependency
+            
+        """
+        if item in self.dependencies:
+            raise ValueError("{} is already an item".format(item))
+        dependencies = list(dependencies)
+        self._check_new_dependencies(item, dependencies)
+        
+        # Items can only depend on [item] already if it was a missing 
+        # dependency
+        graph = self._graph
+        i = graph.index.get(item)
+        if i is not None and graph.dependents_of(i):
+            path = graph.shortest_path([graph.index[dependency] 
+                                        for dependency in dependencies], i)
+            if path is not None:
+                raise self._circular_dependency_exception(
+                    [self._cycle_through([i] + path[:-1])])
+        i = graph.add_node(item)
+        graph.set_dependencies(i, [graph.index[dependency] 
+                                   for dependency in dependencies])
+        self._resolution_order_components_cache = None
+        self._affected_cache.clear()
+        self._forget_disk_cache()
+        self._forget_partial_dependencies(i)
+        self._reachability_index = None
+        
+        # Nothing can depend on [item] yet, unless it was a missing dependency
+        # in which case nothing has been cached
+        if self._order is not None:
+            positions = self._order_positions
+            positions.extend(array("i", [-1]) * 
+                             (graph.num_nodes - len(positions)))
+            positions[i] = len(self._order)
+            self._order.append(i)
+        if self._known_dependencies is not None:
+            self._update_complete_dependencies(i)
+    
+    
+    def remove_item(self, item):
+        """Remove an item that no other item depends on.
+        
+        The cached ordering, complete dependencies and index of dependents are 
+        updated in place instead of being recomputed, so this only takes time 
+        in proportion to the removed item's dependencies.
+        
+        Parameters
+        ----------
+        item : str or int
+            The item to remove
+            
+        """
+        graph = self._graph
+        i = graph.node(item)
+        item_dependents = graph.dependents_of(i)
+        if item_dependents:
+            raise ValueError("Can't remove {0}, as {1} depend(s) on it".format(
+                item, [graph.items[dependent] for dependent in item_dependents]))
+        
+        graph.remove_node(i)
+        self._resolution_order_components_cache = None
+        self._affected_cache.clear()
+        self._forget_disk_cache()
+        self._forget_partial_dependencies(i)
+        self._reachability_index = None
+        if self._order is not None:
+            self._order[self._order_positions[i]] = -1
+            self._order_positions[i] = -1
+        if self._known_dependencies is not None:
+            self._known_dependencies.remove(i)
+    
+    
+    def modify_item(self, item, dependencies):
+        """Replace the items that an existing item depends on.
+        
+        Instead of being recomputed, the cached ordering is fixed up by only 
+        moving items between [item] and its new dependencies, and only the 
+        complete dependencies of [item] and of the items that depend on it are
+        recomputed, so this takes time in proportion to the part of the graph
+        that is affected by the change.
+        
+        Parameters
+        ----------
+        item : str or int
+            The item to modify
+            
+        dependencies : list
+            The items that [item] now depends on, which must already exist, and
+            must not depend on [item]
+            
+        """
+        graph = self._graph
+        i = graph.node(item)
+        dependencies = list(dependencies)
+        self._check_new_dependencies(item, dependencies)
+        
+        dependency_nodes = [graph.index[dependency] 
+                            for dependency in dependencies]
+        old_dependency_nodes = set(graph.dependencies_of(i))
+        new_dependency_nodes = [j for j in dict.fromkeys(dependency_nodes) 
+                                if j not in old_dependency_nodes]
+        if self._order is not None:
+            for j in new_dependency_nodes:
+                self._reorder_for_dependency(i, j)
+        else:
+            path = graph.shortest_path(new_dependency_nodes, i)
+            if path is not None:
+                raise self._circular_dependency_exception(
+                    [self._cycle_through([i] + path[:-1])])
+        
+        graph.set_dependencies(i, dependency_nodes)
+        self._resolution_order_components_cache = None
+        self._affected_cache.clear()
+        self._forget_disk_cache()
+        self._forget_partial_dependencies(i)
+        self._reachability_index = None
+        if self._known_dependencies is not None:
+            self._update_complete_dependencies(i)
+    
+    
+    def _execution_plan(self, tasks):
+        """Check that there is a task for every item, and that the items can be
+        ordered, before running any tasks with self.execute or 
+        self.execute_async
+        
+        Returns
+        -------
+        dependents : dict
+            A dictionary of {item: list of items that directly depend on item}
+            
+        in_degrees : dict
+            A dictionary of {item: number of direct dependencies of item}
+            
+        """
+        if not callable(tasks):
+            missing_tasks = [item for item in self.dependencies 
+                             if item not in tasks]
+            if missing_tasks:
+                raise KeyError("No task for item(s): {}".format(missing_tasks))
+        self._cached_node_order()
+        graph = self._graph
+        items = graph.items
+        dependents = {}
+        in_degrees = {}
+        for i in graph.nodes():
+            dependents[items[i]] = [items[j] for j in graph.dependents_of(i)]
+            in_degrees[items[i]] = len(graph.dependencies_of(i))
+        return dependents, in_degrees
+    
+    
+    def critical_path(self, durations):
+        """Find the longest chain of dependencies, weighted by how long each 
+        item takes, which is the least time that resolving every item can take
+        no matter how many items resolve at the same time.
+        
+        Parameters
+        ----------
+        durations : dict or callable
+            Either a dictionary of {item: duration}, with a duration for every 
+            item, or a function of an item returning its duration. Durations 
+            can be in any unit, but can't be negative.
+            
+        Returns
+        -------
+        length : float
+            The total duration of the items on the critical path
+            
+        critical_path : list
+            The items on the critical path, each after the item it depends on
+            
+        """
+        order = self._cached_node_order()
+        node_durations = self._node_durations(durations)
+        earliest_starts, _, critical_dependencies, makespan = \
+            scheduling.timings(order, self._graph.dependencies_of, 
+                               node_durations)
+        
+        # Follow the dependencies that finish last back from the first item 
+        # in the ordering that finishes last
+        path = []
+        i = next((i for i in order 
+                  if earliest_starts[i] + node_durations[i] == makespan), -1)
+        while i >= 0:
+            path.append(i)
+            i = critical_dependencies[i]
+        items = self._graph.items
+        return makespan, [items[i] for i in reversed(path)]
+    
+    
+    def start_times(self, durations):
+        """Find when each item can start at the earliest, once all of its 
+        dependencies have finished, and at the latest, without delaying the 
+        items that depend on it past the length of the critical path (see 
+        self.critical_path). The difference is the item's slack: how long it 
+        can be delayed for, where items without slack are on a critical path. 
+        This takes one pass over the items in order, and one pass back.
+        
+        Parameters
+        ----------
+        durations : dict or callable
+            The duration of every item, see self.critical_path
+            
+        Returns
+        -------
+        start_times : dict
+            A dictionary of {item: {"earliest_start": time, "latest_start": 
+            time, "slack": time}}, in the order of the items, with times 
+            counted from the start of the first items
+            
+        """
+        order = self._cached_node_order()
+        earliest_starts, latest_starts, _, _ = scheduling.timings(
+            order, self._graph.dependencies_of, self._node_durations(durations))
+        items = self._graph.items
+        return {items[i]: {"earliest_start": earliest_starts[i], 
+                           "latest_start": latest_starts[i], 
+                           "slack": latest_starts[i] - earliest_starts[i]} 
+                for i in self._graph.nodes()}
+    
+    
+    def estimate_makespan(self, durations, num_workers):
+        """Estimate how long resolving every item takes with [num_workers] 
+        items resolving at a time, by simulating list scheduling: whenever a 
+        worker is free, it starts the ready item with the earliest latest 
+        start time (see self.start_times), so that items on the critical path 
+        go first. This is never less than the length of the critical path, and
+        reaches it once there are enough workers.
+        
+        Parameters
+        ----------
+        durations : dict or callable
+            The duration of every item, see self.critical_path
+            
+        num_workers : int
+            How many items can resolve at the same time
+            
+        Returns
+        -------
+        makespan : float
+            When the last item finishes in the simulation
+            
+        start_times : dict
+            A dictionary of {item: simulated start time}, in the order the 
+            items start
+            
+        """
+        assert isinstance(num_workers, int) and num_workers >= 1, \
+            '[num_workers] must be a positive int'
+        order = self._cached_node_order()
+        graph = self._graph
+        node_durations = self._node_durations(durations)
+        _, latest_starts, _, _ = scheduling.timings(
+            order, graph.dependencies_of, node_durations)
+        starts, makespan = scheduling.list_schedule(
+            order, graph.dependencies_of, graph.dependents_of, node_durations,
+            latest_starts, num_workers)
+        items = graph.items
+        return makespan, {items[i]: start for i, start in starts.items()}
+    
+    
+    def _node_durations(self, durations):
+        """Return a dictionary of {node: duration} of the items, given 
+        [durations] as a dictionary or function of the items
+        """
+        graph = self._graph
+        items = graph.items
+        if callable(durations):
+            node_durations = {i: durations(items[i]) for i in graph.nodes()}
+        else:
+            missing_durations = [item for item in self.dependencies 
+                                 if item not in durations]
+            if missing_durations:
+                raise KeyError("No duration for item(s): {}".format(
+                    missing_durations))
+            node_durations = {i: durations[items[i]] for i in graph.nodes()}
+        assert all(duration >= 0 for duration in node_durations.values()), \
+            '[durations] must not be negative'
+        return node_durations
+    
+    
+    def execute(self, tasks, executor="thread", max_workers=None, 
+                fail_fast=True):
+        """Run a task for every item, in parallel where the dependencies allow 
+        it: each item's task is submitted to a concurrent.futures executor as 
+        soon as the tasks of all of its direct dependencies have succeeded, 
+        instead of running the items one after another in the order from 
+        self.resolve_dependencies.
+        
+        Parameters
+        ----------
+        tasks : dict or callable
+            Either a dictionary of {item: callable taking no arguments}, with a
+            callable for every item, or a single callable that is called with 
+            each item. With a process pool, tasks must be picklable.
+            
+        executor : str or concurrent.futures.Executor (default of "thread")
+            "thread" for a ThreadPoolExecutor, "process" for a 
+            ProcessPoolExecutor, or an existing executor (which is left 
+            running afterwards)
+            
+        max_workers : int (default of None)
+            The most tasks to run at the same time, when None the executor's 
+            own default is used
+            
+        fail_fast : bool (default of True)
+            If True, stop submitting tasks as soon as one fails (and cancel the
+            ones that haven't started), otherwise keep running every task that 
+            doesn't depend on a failed one
+            
+        Returns
+        -------
+        results : dict
+            A dictionary of {item: TaskResult}, where each TaskResult has the 
+            status of the task (one of "succeeded", "failed", "skipped" because
+            a dependency failed, or "cancelled" because of fail_fast), what it 
+            returned or raised, and when it started and finished
+            
+        """
+        dependents, in_degrees = self._execution_plan(tasks)
+        return execution.execute(dependents, in_degrees, tasks, 
+                                 executor=executor, max_workers=max_workers, 
+                                 fail_fast=fail_fast)
+    
+    
+    def execute_incremental(self, tasks, digests, cache, executor="thread", 
+                            max_workers=None, fail_fast=True):
+        """Run the tasks of only the items whose inputs changed since an 
+        earlier run, the way make or bazel do, and reuse the stored results of 
+        every other item. Each item is fingerprinted, in order, from the 
+        digest of its inputs and the fingerprints of its direct dependencies, 
+        so changing an item's inputs changes the fingerprints of everything 
+        that depends on it, directly or not. Items whose fingerprint has a 
+        result in [cache] aren't run, the rest are run with self.execute, and 
+        the results of the ones that succeed are stored in [cache] for the 
+        next run.
+        
+        Parameters
+        ----------
+        tasks : dict or callable
+            The task of every item, see self.execute
+        
+        digests : dict or callable
+            Either a dictionary of {item: digest}, with a digest for every 
+            item, or a function of an item returning its digest. A digest is a 
+            str or bytes that changes whenever the item's own inputs (ex. its 
+            source files or parameters) do.
+        
+        cache : RunCache
+            Where results are stored between runs, ex. a DirectoryRunCache or 
+            SQLiteRunCache, see the run_cache module
+        
+        executor, max_workers, fail_fast
+            See self.execute
+        
+        Returns
+        -------
+        results : dict
+            A dictionary of {item: TaskResult}, see self.execute, where the 
+            items that weren't run have the status "cached" and the result 
+            from [cache]
+        
+        """
+        dependents, in_degrees = self._execution_plan(tasks)
+        graph = self._graph
+        items = graph.items
+        if callable(digests):
+            node_digests = {i: digests(items[i]) for i in graph.nodes()}
+        else:
+            missing_digests = [item for item in self.dependencies
+                               if item not in digests]
+            if missing_digests:
+                raise KeyError("No digest for item(s): {}".format(
+                    missing_digests))
+            node_digests = {i: digests[items[i]] for i in graph.nodes()}
+        assert all(isinstance(digest, (str, bytes))
+                   for digest in node_digests.values()), \
+            '[digests] must be str or bytes'
+        node_fingerprints = run_cache.fingerprints(
+            self._cached_node_order(), graph.dependencies_of, items, 
+            node_digests)
+        
+        # Only the items to run (and the dependencies between them) are 
+        # passed on, the cached ones count as already succeeded
+        cached_results = {}
+        for i in graph.nodes():
+            found, result = cache.get(node_fingerprints[i])
+            if found:
+                cached_results[items[i]] = \
+                    execution.TaskResult(items[i], execution.CACHED, result)
+        self._count("run_cache_hits", len(cached_results))
+        self._count("run_cache_misses", len(in_degrees) - len(cached_results))
+        run_dependents = {}
+        run_in_degrees = {}
+        for i in graph.nodes():
+            item = items[i]
+            if item not in cached_results:
+                run_dependents[item] = [dependent
+                                        for dependent in dependents[item]
+                                        if dependent not in cached_results]
+                run_in_degrees[item] = sum(
+                    items[j] not in cached_results
+                    for j in graph.dependencies_of(i))
+        results = execution.execute(run_dependents, run_in_degrees, tasks, 
+                                    executor=executor, 
+                                    max_workers=max_workers, 
+                                    fail_fast=fail_fast)
+        for i in graph.nodes():
+            result = results.get(items[i])
+            if result is not None and result.status == execution.SUCCEEDED:
+                cache.put(node_fingerprints[i], result.result)
+        return {item: cached_results.get(item) or results[item]
+                for item in in_degrees}
+    
+    
+    async def execute_async(self, tasks, max_concurrency=None, 
+                            fail_fast=True):
+        """The asyncio counterpart of self.execute, for tasks that are 
+        coroutines: each item's coroutine is started on the running event loop
+        as soon as the coroutines of all of its direct dependencies have 
+        succeeded. Finished coroutines start their dependents directly, so 
+        nothing is polled.
+        
+        Parameters
+        ----------
+        tasks : dict or callable
+            Either a dictionary of {item: coroutine function taking no 
+            arguments}, with one for every item, or a single coroutine function
+            that is called with each item
+            
+        max_concurrency : int (default of None)
+            The most coroutines to run at the same time (enforced with an 
+            asyncio.Semaphore), at least 1, when None there is no limit
+            
+        fail_fast : bool (default of True)
+            If True, cancel every running coroutine and start no more as soon 
+            as one fails, otherwise keep running every coroutine that doesn't 
+            depend on a failed one. Either way, the items that depend on a 
+            failed one are never started.
+            
+        Returns
+        -------
+        results : dict
+            A dictionary of {item: TaskResult}, see self.execute
+            
+        """
+        dependents, in_degrees = self._execution_plan(tasks)
+        return await execution.execute_async(
+            dependents, in_degrees, tasks, max_concurrency=max_concurrency, 
+            fail_fast=fail_fast)
+
+
+class FrozenDependencies(Dependencies):
+    """An immutable snapshot of a Dependencies object, usually made with 
+    Dependencies.freeze, that many threads can query at the same time without
+    locks.
+    
+    Everything that a Dependencies object computes and caches the first time 
+    it is needed (the ordering, the index of dependents, the reachability 
+    index, and the complete dependencies if asked for) is computed up front 
+    instead, so queries only read. Items can't be added, removed or modified 
+    in place: self.with_item and self.without_item return a new snapshot with
+    the change, built by copying this one and rebuilding the copy, so a new 
+    version of the items can be swapped in with a single assignment while 
+    other threads keep reading the old one.
+    
+    Without the complete dependencies, each call to 
+    self.complete_dependencies searches the item's dependencies again, and 
+    self.complete_dependencies_closure (and so 
+    self.complete_dependencies_dict) builds them again, without keeping them.
+    Results of self.affected_by aren't cached either. The groups of items 
+    shared by self.count_resolution_orders and self.sample_resolution_order 
+    are computed when first needed, but in full before being stored in one 
+    assignment, so readers never see part of them.
+    """
+    
+    affected_cache_size = 0
+    
+    def __init__(self, dependencies={}, closure_mode="sets", stats=None, 
+                 complete=False):
+        """Initialize the FrozenDependencies object, see Dependencies and 
+        Dependencies.freeze. Missing and circular dependencies raise an 
+        exception here, since the ordering is computed right away.
+        """
+        Dependencies.__init__(self, dependencies, closure_mode=closure_mode, 
+                              stats=stats)
+        self._precompute(complete)
+        
+    
+    @classmethod
+    def from_edges(cls, edges, add_missing=False, complete=False, **kwargs):
+        """Create a FrozenDependencies object from (item, dependency) pairs, 
+        see Dependencies.from_edges. The pairs are read into a Dependencies 
+        object first, which is then frozen in place, so that everything is 
+        computed from the items that were read. Dependencies.from_csv and 
+        Dependencies.from_jsonl build frozen objects through here as well.
+        """
+        dependencies = Dependencies.from_edges(edges, add_missing=add_missing, 
+                                               **kwargs)
+        return cls._freeze_in_place(dependencies, complete)
+    
+    
+    @classmethod
+    def _freeze_in_place(cls, dependencies, complete=False):
+        """Turn [dependencies], a Dependencies object that nothing else holds,
+        into a snapshot without copying it
+        """
+        dependencies.__class__ = cls
+        dependencies._affected_cache = {}
+        dependencies._precompute(complete)
+        return dependencies
+    
+    
+    def _precompute(self, complete):
+        """Compute everything that would otherwise be computed when first 
+        needed, including the complete dependencies if [complete]
+        """
+        graph = self._graph
+        graph.compact()
+        graph.reverse.compact(graph.num_nodes)
+        self._load_disk_cache()
+        self._cached_node_order()
+        if complete and self._known_dependencies is None:
+            self._complete_dependencies()
+        self._reachability()
+    
+    
+    def complete_dependencies(self, item):
+        if self._known_dependencies is not None:
+            return Dependencies.complete_dependencies(self, item)
+        i = self._graph.node(item)
+        items = self._graph.items
+        return [items[j] for j in sorted(self._reachable_order([i])) if j != i]
+    
+    
+    def complete_dependencies_closure(self):
+        if self._known_dependencies is not None:
+            return Dependencies.complete_dependencies_closure(self)
+        closure_class = BitsetClosure if self.closure_mode == "bitset" \
+            else SetClosure
+        with self._phase("closure"):
+            return closure_class.from_order(self._graph, self._order)
+    
+    
+    def freeze(self, complete=False):
+        """Return this object if it is already frozen with everything that 
+        [complete] asks for, otherwise a copy that is
+        """
+        if complete and self._known_dependencies is None:
+            return Dependencies.freeze(self, complete)
+        return self
+    
+    
+    def thaw(self):
+        """Return a Dependencies object with a copy of the items, which can be
+        changed
+        """
+        return self._copy(Dependencies)
+    
+    
+    def with_item(self, item, dependencies=()):
+        """Return a new snapshot where [item] depends on [dependencies], adding
+        [item] if it isn't an item yet, see Dependencies.add_item and 
+        Dependencies.modify_item. 
+        
+        This snapshot is copied once, and the change is made to the copy, 
+        which updates its ordering and any complete dependencies in place. 
+        The copy is then frozen as it is, which rebuilds its index of 
+        dependents and its reachability index in full, so every change takes 
+        O(V+E) time for V items and E dependencies. To make many changes at 
+        once, change the object from self.thaw and freeze it again.
+        """
+        thawed = self.thaw()
+        if item in thawed.dependencies:
+            thawed.modify_item(item, dependencies)
+        else:
+            thawed.add_item(item, dependencies)
+        return self._freeze_in_place(thawed)
+    
+    
+    def without_item(self, item):
+        """Return a new snapshot without [item], see Dependencies.remove_item 
+        and self.with_item, which this takes as long as
+        """
+        thawed = self.thaw()
+        thawed.remove_item(item)
+        return self._freeze_in_place(thawed)
+    
+    
+    def add_item(self, item, dependencies=()):
+        raise TypeError("FrozenDependencies can't be changed, use with_item")
+    
+    
+    def remove_item(self, item):
+        raise TypeError(
+            "FrozenDependencies can't be changed, use without_item")
+    
+    
+    def modify_item(self, item, dependencies):
+        raise TypeError("FrozenDependencies can't be changed, use with_item")
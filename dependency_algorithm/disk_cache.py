@@ -0,0 +1,176 @@
+"""disk_cache - save the ordering, levels and complete dependencies of a graph
+to disk, so that another process with the same graph can memory-map them back
+in instead of recomputing them
+"""
+
+from array import array
+import hashlib
+import mmap
+import os
+import tempfile
+
+
+# Identifies cache files, followed by a number that reads back differently if
+# the file was written with a different byte order
+_MAGIC = b"DEPALG01"
+_BYTE_ORDER_CHECK = 0x01020304
+
+
+def graph_digest(graph):
+    """Return a stable hash of the contents of a CompactGraph, or None if its
+    items can't be hashed stably (only str and int items can be)
+
+    Parameters
+    ----------
+    graph : CompactGraph
+        The graph to hash, including the order of its items and of each item's
+        dependencies, which decide the node indices
+
+    Returns
+    -------
+    digest : str or None
+        The hex digest of the graph
+
+    """
+    if not all(type(item) in (str, int) for item in graph.items):
+        return None
+    graph.compact()
+    hasher = hashlib.sha256()
+    hasher.update("\0".join(map(repr, graph.items)).encode(
+        "utf-8", "surrogatepass"))
+    hasher.update(bytes(graph.present))
+    for ints in (graph.forward.offsets, graph.forward.targets):
+        hasher.update(len(ints).to_bytes(8, "little"))
+        hasher.update(array("i", ints).tobytes())
+    return hasher.hexdigest()
+
+
+class DiskCache(object):
+    """The ordering, levels and complete dependencies of a graph, read from a
+    memory-mapped file, so that pages are only read from disk as they are
+    used. Every attribute is a memoryview of C ints over node indices:
+
+    order            -- the nodes of the items, in an order that resolves them
+    level_nodes      -- the nodes of the items, level by level
+    level_offsets    -- where each level starts in level_nodes, then its length
+    closure_offsets  -- where each node's complete dependencies start in
+                        closure_targets, then its length
+    closure_targets  -- the complete dependencies of every node, one after the
+                        other, each node's in ascending order
+    """
+
+    __slots__ = ("order", "level_nodes", "level_offsets", "closure_offsets",
+                 "closure_targets", "_mmap")
+
+    @staticmethod
+    def path(cache_dir, digest):
+        """The file that the cache of a graph with hash [digest] is saved in
+        """
+        return os.path.join(cache_dir, digest + ".depcache")
+
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a cache file, returning None if it doesn't exist or was
+        written with a different byte order or format
+        """
+        try:
+            with open(path, "rb") as cache_file:
+                mapped = mmap.mmap(cache_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        num_bytes = len(mapped) - len(_MAGIC)
+        if mapped[:len(_MAGIC)] != _MAGIC or num_bytes < 16 or num_bytes % 4:
+            return None
+        ints = memoryview(mapped)[len(_MAGIC):].cast("i")
+        byte_order_check, num_items, num_levels, num_nodes = ints[:4]
+        if byte_order_check != _BYTE_ORDER_CHECK or \
+                len(ints) < 4 + 2 * num_items + num_levels + num_nodes + 2:
+            return None
+
+        cache = cls()
+        cache._mmap = mapped
+        start = 4
+        for name, length in (("order", num_items),
+                             ("level_nodes", num_items),
+                             ("level_offsets", num_levels + 1),
+                             ("closure_offsets", num_nodes + 1)):
+            setattr(cache, name, ints[start:start + length])
+            start += length
+        if len(ints) != start + cache.closure_offsets[num_nodes]:
+            return None
+        cache.closure_targets = ints[start:]
+        return cache
+
+
+    @staticmethod
+    def save(path, order, levels, closure):
+        """Write the cache file of a graph. The file is written next to [path]
+        and then moved into place, so other processes never see part of it.
+
+        Parameters
+        ----------
+        path : str
+            Where to save the cache, see DiskCache.path
+
+        order : array of int
+            The nodes of the items, in an order that resolves them
+
+        levels : list of lists of int
+            The nodes of the items, level by level
+
+        closure : Closure
+            The complete dependencies of every node
+
+        """
+        num_nodes = closure.graph.num_nodes
+        closure_offsets = array("i", [0])
+        closure_targets = array("i")
+        for i in range(num_nodes):
+            closure_targets.extend(closure.nodes(i))
+            closure_offsets.append(len(closure_targets))
+        level_nodes = array("i")
+        level_offsets = array("i", [0])
+        for level in levels:
+            level_nodes.extend(level)
+            level_offsets.append(len(level_nodes))
+        header = array("i", [_BYTE_ORDER_CHECK, len(order), len(levels),
+                             num_nodes])
+
+        cache_dir = os.path.dirname(path) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=cache_dir)
+        try:
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                cache_file.write(_MAGIC)
+                for ints in (header, array("i", order), level_nodes,
+                             level_offsets, closure_offsets, closure_targets):
+                    ints.tofile(cache_file)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+
+    def order_array(self):
+        """Return a copy of the order of nodes, as an array
+        """
+        order = array("i")
+        order.frombytes(self.order.cast("B"))
+        return order
+
+
+    def levels(self):
+        """Return the levels of nodes as a list of lists
+        """
+        offsets, nodes = self.level_offsets, self.level_nodes
+        return [nodes[offsets[k]:offsets[k + 1]].tolist()
+                for k in range(len(offsets) - 1)]
+
+
+    def closure_row(self, i):
+        """Return the complete dependencies of node [i]
+        """
+        return self.closure_targets[
+            self.closure_offsets[i]:self.closure_offsets[i + 1]]
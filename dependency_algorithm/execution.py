@@ -0,0 +1,310 @@
+"""execution - run a task for every item, starting each task as soon as the
+tasks of the item's dependencies have finished
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
+import time
+
+
+# The possible statuses of a task
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"      # -- one of the item's dependencies failed
+CANCELLED = "cancelled"  # -- stopped early because another task failed
+CACHED = "cached"        # -- the result was stored by an earlier run
+
+
+class TaskResult(object):
+    """The outcome of running the task of one item
+    """
+
+    def __init__(self, item, status, result=None, exception=None,
+                 start_time=None, end_time=None):
+        """Initialize the TaskResult object
+
+        Parameters
+        ----------
+        item : str or int
+            The item that the task was run for
+
+        status : str
+            One of SUCCEEDED, FAILED, SKIPPED, CANCELLED or CACHED
+
+        result : object (default of None)
+            What the task returned, if it succeeded
+
+        exception : Exception (default of None)
+            What the task raised, if it failed
+
+        start_time, end_time : float (default of None)
+            When the task started and finished (as from time.time), if it ran
+
+        """
+        self.item = item
+        self.status = status
+        self.result = result
+        self.exception = exception
+        self.start_time = start_time
+        self.end_time = end_time
+
+
+    @property
+    def duration(self):
+        """How long the task took to run in seconds, or None if it didn't run
+        """
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+
+    def __repr__(self):
+        return "TaskResult({0!r}, {1!r})".format(self.item, self.status)
+
+
+def _run_task(task, item, pass_item):
+    """Run a task, timing it and catching any exception it raises, so that
+    both can be sent back from another process
+    """
+    start_time = time.time()
+    try:
+        result = task(item) if pass_item else task()
+        exception = None
+    except Exception as e:
+        result, exception = None, e
+    return result, exception, start_time, time.time()
+
+
+async def _run_task_async(task, item, pass_item):
+    """Await a coroutine task, timing it and catching any exception it raises
+    """
+    start_time = time.time()
+    try:
+        result = await (task(item) if pass_item else task())
+        exception = None
+    except Exception as e:
+        result, exception = None, e
+    return result, exception, start_time, time.time()
+
+
+def _downstream_items(dependents, item):
+    """Return every item that depends, directly or not, on [item]
+    """
+    downstream = set()
+    stack = [item]
+    while stack:
+        for dependent in dependents[stack.pop()]:
+            if dependent not in downstream:
+                downstream.add(dependent)
+                stack.append(dependent)
+    return downstream
+
+
+def execute(dependents, in_degrees, tasks, executor="thread",
+            max_workers=None, fail_fast=True):
+    """Run the task of every item in a concurrent.futures executor, submitting
+    each task as soon as the tasks of all of the item's direct dependencies
+    have succeeded. See Dependencies.execute.
+
+    Parameters
+    ----------
+    dependents : dict
+        A dictionary of {item: list of items that directly depend on item}
+
+    in_degrees : dict
+        A dictionary of {item: number of direct dependencies of item}, for
+        every item, in the order in which to report results
+
+    tasks, executor, max_workers, fail_fast
+        See Dependencies.execute
+
+    Returns
+    -------
+    results : dict
+        A dictionary of {item: TaskResult}
+
+    """
+    if isinstance(executor, Executor):
+        pool, owns_pool = executor, False
+    elif executor == "thread":
+        pool, owns_pool = ThreadPoolExecutor(max_workers=max_workers), True
+    elif executor == "process":
+        pool, owns_pool = ProcessPoolExecutor(max_workers=max_workers), True
+    else:
+        raise ValueError('[executor] must be "thread", "process" or a '
+                         'concurrent.futures.Executor')
+
+    remaining_dependencies = dict(in_degrees)
+    ready = deque(item for item, in_degree in in_degrees.items()
+                  if in_degree == 0)
+    running = {}
+    results = {}
+    stopping = False
+
+    try:
+        while ready or running:
+
+            # Submit everything that is ready, up to the cap on workers
+            while ready and not stopping and \
+                    (max_workers is None or len(running) < max_workers):
+                item = ready.popleft()
+                try:
+                    if callable(tasks):
+                        future = pool.submit(_run_task, tasks, item, True)
+                    else:
+                        future = pool.submit(_run_task, tasks[item], item,
+                                             False)
+                except Exception as e:  # -- ex. a broken process pool
+                    future = Future()
+                    future.set_exception(e)
+                running[future] = item
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item = running.pop(future)
+                if future.cancelled():
+                    results[item] = TaskResult(item, CANCELLED)
+                    continue
+
+                # Errors of the executor itself, rather than of the task, ex.
+                # a task or result that can't be pickled, fail the item too
+                if future.exception() is None:
+                    result, exception, start_time, end_time = future.result()
+                else:
+                    result, exception, start_time, end_time = \
+                        None, future.exception(), None, None
+                if exception is None:
+                    results[item] = TaskResult(
+                        item, SUCCEEDED, result=result,
+                        start_time=start_time, end_time=end_time)
+                    for dependent in dependents[item]:
+                        remaining_dependencies[dependent] -= 1
+                        if remaining_dependencies[dependent] == 0:
+                            ready.append(dependent)
+                else:
+                    results[item] = TaskResult(
+                        item, FAILED, exception=exception,
+                        start_time=start_time, end_time=end_time)
+                    if fail_fast and not stopping:
+                        stopping = True
+                        for other_future in running:
+                            other_future.cancel()
+                    for downstream_item in _downstream_items(dependents, item):
+                        if downstream_item not in results:
+                            results[downstream_item] = \
+                                TaskResult(downstream_item, SKIPPED)
+    finally:
+        if owns_pool:
+            pool.shutdown(wait=True)
+
+    return {item: results.get(item) or TaskResult(item, CANCELLED)
+            for item in in_degrees}
+
+
+async def execute_async(dependents, in_degrees, tasks, max_concurrency=None,
+                        fail_fast=True):
+    """Run the coroutine task of every item on the running event loop,
+    starting each task as soon as the tasks of all of the item's direct
+    dependencies have succeeded. See Dependencies.execute_async.
+
+    Parameters
+    ----------
+    dependents : dict
+        A dictionary of {item: list of items that directly depend on item}
+
+    in_degrees : dict
+        A dictionary of {item: number of direct dependencies of item}, for
+        every item, in the order in which to report results
+
+    tasks, max_concurrency, fail_fast
+        See Dependencies.execute_async
+
+    Returns
+    -------
+    results : dict
+        A dictionary of {item: TaskResult}
+
+    """
+    assert max_concurrency is None or \
+        (isinstance(max_concurrency, int) and max_concurrency >= 1), \
+        '[max_concurrency] must be None or a positive int'
+    loop = asyncio.get_running_loop()
+    semaphore = None if max_concurrency is None else \
+        asyncio.Semaphore(max_concurrency)
+    remaining_dependencies = dict(in_degrees)
+    running = {}
+    results = {}
+    all_finished = loop.create_future()
+    stopping = False
+
+    async def run(item):
+        if semaphore is None:
+            return await _run_task_async(task_for(item), item, callable(tasks))
+        async with semaphore:
+            return await _run_task_async(task_for(item), item, callable(tasks))
+
+    def task_for(item):
+        return tasks if callable(tasks) else tasks[item]
+
+    def start(item):
+        task = loop.create_task(run(item))
+        running[item] = task
+        task.add_done_callback(lambda task: finish(item, task))
+
+    def finish(item, task):
+
+        # Called by the event loop whenever a task is done, so nothing polls
+        nonlocal stopping
+        del running[item]
+        if task.cancelled():
+            results[item] = TaskResult(item, CANCELLED)
+        else:
+            result, exception, start_time, end_time = task.result()
+            if exception is None:
+                results[item] = TaskResult(
+                    item, SUCCEEDED, result=result,
+                    start_time=start_time, end_time=end_time)
+                for dependent in dependents[item]:
+                    remaining_dependencies[dependent] -= 1
+                    if remaining_dependencies[dependent] == 0 and \
+                            not stopping:
+                        start(dependent)
+            else:
+                results[item] = TaskResult(
+                    item, FAILED, exception=exception,
+                    start_time=start_time, end_time=end_time)
+                for downstream_item in _downstream_items(dependents, item):
+                    if downstream_item not in results:
+                        results[downstream_item] = \
+                            TaskResult(downstream_item, SKIPPED)
+                if fail_fast and not stopping:
+                    stopping = True
+                    for other_task in running.values():
+                        other_task.cancel()
+        if not running and not all_finished.done():
+            all_finished.set_result(None)
+
+    for item, in_degree in in_degrees.items():
+        if in_degree == 0:
+            start(item)
+    try:
+        if running:
+            await all_finished
+    finally:
+
+        # If this coroutine is cancelled, so are the tasks it started
+        for task in list(running.values()):
+            task.cancel()
+
+    return {item: results.get(item) or TaskResult(item, CANCELLED)
+            for item in in_degrees}
@@ -0,0 +1,682 @@
+"""graph - a compact representation of the dependency graph, with items
+interned to integer node indices and the dependencies of every node kept in
+flat arrays of C ints
+"""
+
+from array import array
+from collections import deque
+from collections.abc import Mapping
+import heapq
+from operator import sub
+
+
+class Adjacency(object):
+    """One row of node indices per node, in compressed sparse row (CSR) form.
+
+    The row of node i is targets[offsets[i]:offsets[i + 1]], so the rows of
+    all nodes take two flat arrays of C ints instead of one list of Python
+    objects per node. Rows that change after the arrays are built are kept in
+    the changed_rows overlay, so that editing one row doesn't rebuild the
+    arrays, until self.compact folds them back in.
+    """
+
+    __slots__ = ("offsets", "targets", "changed_rows")
+
+    def __init__(self, offsets=None, targets=None):
+        """Initialize the Adjacency object
+
+        Parameters
+        ----------
+        offsets : array of int (default of None)
+            Where the row of each node starts in [targets], followed by the
+            length of [targets], when None there are no rows yet
+
+        targets : array of int (default of None)
+            The rows of all nodes, one after the other
+
+        """
+        self.offsets = array("i", [0]) if offsets is None else offsets
+        self.targets = array("i") if targets is None else targets
+        self.changed_rows = {}
+
+
+    @classmethod
+    def from_edges(cls, num_rows, sources, targets):
+        """Build the rows of nodes 0..[num_rows]-1 from the node indices of the
+        edges [sources][k] -> [targets][k] (two arrays of ints, in any order)
+        with a counting sort, dropping repeated edges. Each row keeps its 
+        targets in the order they were first given in.
+        """
+        row_starts = [0] * (num_rows + 1)
+        for i in sources:
+            row_starts[i + 1] += 1
+        for i in range(num_rows):
+            row_starts[i + 1] += row_starts[i]
+        offsets = array("i", row_starts)
+        sorted_targets = array("i", [0]) * len(targets)
+        for i, j in zip(sources, targets):
+            sorted_targets[row_starts[i]] = j
+            row_starts[i] += 1
+
+        # Drop repeated edges in place, one row at a time, where last_seen[j]
+        # is the last row that target j was kept in
+        last_seen = array("i", [-1]) * (max(targets, default=-1) + 1)
+        kept = 0
+        start = 0
+        for i in range(num_rows):
+            end = offsets[i + 1]
+            offsets[i] = kept
+            for k in range(start, end):
+                j = sorted_targets[k]
+                if last_seen[j] != i:
+                    last_seen[j] = i
+                    sorted_targets[kept] = j
+                    kept += 1
+            start = end
+        offsets[num_rows] = kept
+        del sorted_targets[kept:]
+        return cls(offsets, sorted_targets)
+
+
+    def copy(self):
+        """Return a copy of the rows that can be changed independently
+        """
+        copied = Adjacency(array("i", self.offsets), array("i", self.targets))
+        copied.changed_rows = dict(self.changed_rows)
+        return copied
+
+
+    def row(self, i):
+        """Return the row of node [i] as an array of node indices, which must
+        not be modified
+        """
+        changed_row = self.changed_rows.get(i)
+        if changed_row is not None:
+            return changed_row
+        offsets = self.offsets
+        if i + 1 < len(offsets):
+            return self.targets[offsets[i]:offsets[i + 1]]
+        return array("i")
+
+
+    def set_row(self, i, row):
+        """Replace the row of node [i] with the node indices in [row]
+        """
+        self.changed_rows[i] = array("i", row)
+
+
+    def compact(self, num_rows):
+        """Fold the changed rows back into the arrays, so that they hold the
+        rows of nodes 0..[num_rows]-1
+        """
+        offsets = self.offsets
+        if self.changed_rows:
+            compacted_offsets = array("i", [0])
+            compacted_targets = array("i")
+            for i in range(num_rows):
+                compacted_targets.extend(self.row(i))
+                compacted_offsets.append(len(compacted_targets))
+            self.offsets, self.targets = compacted_offsets, compacted_targets
+            self.changed_rows = {}
+        elif len(offsets) <= num_rows:
+            offsets.extend(array("i", [offsets[-1]]) *
+                           (num_rows + 1 - len(offsets)))
+
+
+class CompactGraph(object):
+    """The dependency graph, with every item interned to an integer node index.
+
+    Nodes are numbered in the order that items are added, and each node's
+    direct dependencies are a row of a forward Adjacency. The rows of direct
+    dependents (the reverse Adjacency) are only built when first needed, and
+    are then kept up to date by self.set_dependencies. Dependencies that
+    aren't items are interned too, as nodes that aren't present, so that
+    missing dependencies can be reported and items can be added for them
+    later on.
+    """
+
+    __slots__ = ("items", "index", "present", "num_items", "forward",
+                 "_reverse")
+
+    def __init__(self):
+        """Initialize an empty CompactGraph object
+        """
+        self.items = []             # -- node index -> item
+        self.index = {}             # -- item -> node index
+        self.present = bytearray()  # -- 1 if the node is an item, else 0
+        self.num_items = 0
+        self.forward = Adjacency()
+        self._reverse = None
+
+
+    @classmethod
+    def from_dependencies(cls, dependencies):
+        """Build the graph of a dictionary of {item: list of items that this
+        item depends on}. The items are interned first, so that they are
+        numbered 0..n-1 in the order of the dictionary.
+        """
+        graph = cls()
+        for item in dependencies:
+            graph.add_node(item)
+        offsets, targets = graph.forward.offsets, graph.forward.targets
+        index_of = graph.index.__getitem__
+        for item_dependencies in dependencies.values():
+            try:
+                targets.extend(list(map(index_of, item_dependencies)))
+            except KeyError:
+                targets.extend(list(map(graph.intern, item_dependencies)))
+            offsets.append(len(targets))
+        return graph
+
+
+    @classmethod
+    def from_edges(cls, edges, add_missing=False):
+        """Build the graph from an iterable of (item, dependency) pairs, 
+        reading one pair at a time, so that only the arrays of node indices 
+        are kept in memory. Items are numbered in the order they first appear.
+
+        Parameters
+        ----------
+        edges : iterable of tuples
+            (item, dependency) pairs, where a dependency of None only declares
+            the item. Repeated pairs are only counted once.
+
+        add_missing : bool (default of False)
+            If True, dependencies that are never given as items become items 
+            without dependencies, otherwise they are left as missing 
+            dependencies
+
+        """
+        graph = cls()
+        sources, targets = array("i"), array("i")
+        add_node, intern = graph.add_node, graph.intern
+        for item, dependency in edges:
+            i = add_node(item)
+            if dependency is not None:
+                sources.append(i)
+                targets.append(intern(dependency))
+        if add_missing:
+            for j in range(graph.num_nodes):
+                graph.present[j] = 1
+            graph.num_items = graph.num_nodes
+        graph.forward = Adjacency.from_edges(graph.num_nodes, sources, targets)
+        return graph
+
+
+    def copy(self):
+        """Return a copy of the graph that can be changed independently
+        """
+        copied = CompactGraph()
+        copied.items = list(self.items)
+        copied.index = dict(self.index)
+        copied.present = bytearray(self.present)
+        copied.num_items = self.num_items
+        copied.forward = self.forward.copy()
+        if self._reverse is not None:
+            copied._reverse = self._reverse.copy()
+        return copied
+
+
+    @property
+    def num_nodes(self):
+        """The number of nodes, including the ones that aren't items
+        """
+        return len(self.items)
+
+
+    @property
+    def num_edges(self):
+        """The number of dependencies, counting those that aren't items
+        """
+        self.compact()
+        return len(self.forward.targets)
+
+
+    @property
+    def reverse(self):
+        """The Adjacency of direct dependents, built in O(V+E) time on first
+        use, for V nodes and E dependencies
+        """
+        if self._reverse is None:
+            self.compact()
+            num_nodes = self.num_nodes
+            offsets, targets = self.forward.offsets, self.forward.targets
+            num_dependents = [0] * (num_nodes + 1)
+            for j in targets:
+                num_dependents[j + 1] += 1
+            for i in range(num_nodes):
+                num_dependents[i + 1] += num_dependents[i]
+            reverse_offsets = array("i", num_dependents)
+            reverse_targets = array("i", [0]) * len(targets)
+            free_slots = num_dependents
+            for i in range(num_nodes):
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    reverse_targets[free_slots[j]] = i
+                    free_slots[j] += 1
+            self._reverse = Adjacency(reverse_offsets, reverse_targets)
+        return self._reverse
+
+
+    def intern(self, item):
+        """Return the node index of [item], adding a node that isn't present
+        if there isn't one yet
+        """
+        i = self.index.get(item)
+        if i is None:
+            i = self.index[item] = len(self.items)
+            self.items.append(item)
+            self.present.append(0)
+        return i
+
+
+    def add_node(self, item):
+        """Make [item] an item, returning its node index
+        """
+        i = self.intern(item)
+        if not self.present[i]:
+            self.present[i] = 1
+            self.num_items += 1
+        return i
+
+
+    def remove_node(self, i):
+        """Remove the item of node [i], which nothing may depend on. The node
+        is left unused, and the item gets a new node if it is added again.
+        """
+        self.set_dependencies(i, ())
+        self.present[i] = 0
+        self.num_items -= 1
+        del self.index[self.items[i]]
+        self.items[i] = None
+
+
+    def node(self, item):
+        """Return the node index of item [item], raising a KeyError if it isn't
+        an item
+        """
+        i = self.index.get(item)
+        if i is None or not self.present[i]:
+            raise KeyError(item)
+        return i
+
+
+    def is_item(self, item):
+        """Whether [item] is an item (and not just a missing dependency)
+        """
+        i = self.index.get(item)
+        return i is not None and bool(self.present[i])
+
+
+    def nodes(self):
+        """Return the node indices of the items, in the order they were added
+        """
+        present = self.present
+        return [i for i in range(len(present)) if present[i]]
+
+
+    def dependencies_of(self, i):
+        """Return the direct dependencies of node [i], as an array of nodes
+        """
+        return self.forward.row(i)
+
+
+    def dependents_of(self, i):
+        """Return the direct dependents of node [i], as an array of nodes
+        """
+        return self.reverse.row(i)
+
+
+    def set_dependencies(self, i, dependencies):
+        """Replace the direct dependencies of node [i] with the nodes in
+        [dependencies], updating the direct dependents too if they are built
+        """
+        old_dependencies = self.forward.row(i)
+        self.forward.set_row(i, dependencies)
+        reverse = self._reverse
+        if reverse is not None:
+            for j in old_dependencies:
+                dependents = reverse.row(j)
+                dependents.remove(i)
+                reverse.changed_rows[j] = dependents
+            for j in dependencies:
+                dependents = reverse.row(j)
+                dependents.append(i)
+                reverse.changed_rows[j] = dependents
+
+
+    def compact(self):
+        """Fold any changed rows back into flat arrays that cover every node
+        """
+        self.forward.compact(self.num_nodes)
+        if self._reverse is not None:
+            self._reverse.compact(self.num_nodes)
+
+
+    def in_degrees(self):
+        """Return the number of direct dependencies of every node, as an array
+        """
+        self.compact()
+        offsets = self.forward.offsets
+        return array("i", map(sub, offsets[1:], offsets))
+
+
+    def missing_dependencies(self):
+        """Return an (item node, dependency node) pair for every dependency
+        that isn't an item, in the order of the items
+        """
+        if self.num_items == self.num_nodes:
+            return []
+        self.compact()
+        present, offsets, targets = \
+            self.present, self.forward.offsets, self.forward.targets
+        return [(i, targets[k]) for i in self.nodes()
+                for k in range(offsets[i], offsets[i + 1])
+                if not present[targets[k]]]
+
+
+    def edge_problems(self):
+        """Check every dependency of every item in one O(V+E) pass, for V
+        nodes and E dependencies
+
+        Returns
+        -------
+        missing : list of tuples
+            An (item node, dependency node) pair for every dependency that
+            isn't an item
+
+        self_dependencies : list of int
+            The items that depend on themselves
+
+        duplicates : list of tuples
+            An (item node, dependency node) pair for every dependency that is
+            repeated, once per repeat
+
+        isolated : list of int
+            The items without dependencies that no other item depends on
+
+        """
+        self.compact()
+        present, offsets, targets = \
+            self.present, self.forward.offsets, self.forward.targets
+        has_dependents = bytearray(len(present))
+        missing, self_dependencies, duplicates, isolated = [], [], [], []
+        for i in self.nodes():
+            row = targets[offsets[i]:offsets[i + 1]]
+            if not row:
+                continue
+            seen = set()
+            for j in row:
+                if j in seen:
+                    duplicates.append((i, j))
+                    continue
+                seen.add(j)
+                has_dependents[j] = 1
+                if not present[j]:
+                    missing.append((i, j))
+                elif j == i:
+                    self_dependencies.append(i)
+        for i in self.nodes():
+            if offsets[i] == offsets[i + 1] and not has_dependents[i]:
+                isolated.append(i)
+        return missing, self_dependencies, duplicates, isolated
+
+
+    def topological_order(self, priority=None):
+        """Order the items such that every item comes after all of its
+        dependencies, using Kahn's algorithm in O(V+E) time for V nodes and E
+        dependencies (O((V+E) log V) with [priority]). Ties are broken by
+        [priority], a function of a node, if given, and otherwise by node
+        index.
+
+        Returns
+        -------
+        order : list of int
+            The ordered nodes, which are fewer than self.num_items when items
+            are on (or depend on) a circular or missing dependency
+
+        """
+        remaining_dependencies = self.in_degrees().tolist()
+        reverse = self.reverse
+        reverse.compact(self.num_nodes)
+        offsets, targets = reverse.offsets, reverse.targets
+        present = self.present
+        order = []
+
+        if priority is None:
+            ready = deque(i for i in range(self.num_nodes)
+                          if present[i] and remaining_dependencies[i] == 0)
+            while ready:
+                i = ready.popleft()
+                order.append(i)
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    remaining_dependencies[j] -= 1
+                    if remaining_dependencies[j] == 0:
+                        ready.append(j)
+        else:
+            ready = [(priority(i), i) for i in range(self.num_nodes)
+                     if present[i] and remaining_dependencies[i] == 0]
+            heapq.heapify(ready)
+            while ready:
+                _, i = heapq.heappop(ready)
+                order.append(i)
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    remaining_dependencies[j] -= 1
+                    if remaining_dependencies[j] == 0:
+                        heapq.heappush(ready, (priority(j), j))
+        return order
+
+
+    def levels(self):
+        """Group the items into levels, such that every item only depends on
+        items in earlier levels, using Kahn's algorithm one level at a time.
+
+        Returns
+        -------
+        levels : list of lists of int
+            The nodes, level by level, which are fewer than self.num_items when
+            items are on (or depend on) a circular or missing dependency
+
+        """
+        remaining_dependencies = self.in_degrees().tolist()
+        reverse = self.reverse
+        reverse.compact(self.num_nodes)
+        offsets, targets = reverse.offsets, reverse.targets
+        present = self.present
+        levels = []
+        level = [i for i in range(self.num_nodes)
+                 if present[i] and remaining_dependencies[i] == 0]
+        while level:
+            levels.append(level)
+            next_level = []
+            for i in level:
+                for j in targets[offsets[i]:offsets[i + 1]]:
+                    remaining_dependencies[j] -= 1
+                    if remaining_dependencies[j] == 0:
+                        next_level.append(j)
+            level = next_level
+        return levels
+
+
+    def strongly_connected_components(self):
+        """Find the strongly connected components of the items with Tarjan's
+        algorithm, keeping an explicit stack instead of recursing, in O(V+E)
+        time for V nodes and E dependencies. Dependencies that aren't items
+        are ignored.
+
+        Returns
+        -------
+        components : list of lists of int
+            Every strongly connected component, in the order that Tarjan's
+            algorithm completes them
+
+        """
+        self.compact()
+        num_nodes = self.num_nodes
+        offsets, targets = self.forward.offsets, self.forward.targets
+        present = self.present
+        indices = array("i", [-1]) * num_nodes
+        lowlinks = array("i", [0]) * num_nodes
+        on_tarjan_stack = bytearray(num_nodes)
+        tarjan_stack = []
+        components = []
+        num_indexed = 0
+
+        for root in range(num_nodes):
+            if not present[root] or indices[root] >= 0:
+                continue
+            indices[root] = lowlinks[root] = num_indexed
+            num_indexed += 1
+            tarjan_stack.append(root)
+            on_tarjan_stack[root] = 1
+
+            # The nodes being traversed, and how far along its row each is
+            stack = [root]
+            next_edges = [offsets[root]]
+
+            while stack:
+                i = stack[-1]
+                k, end = next_edges[-1], offsets[i + 1]
+                while k < end:
+                    j = targets[k]
+                    k += 1
+                    if not present[j]:
+                        continue
+                    if indices[j] < 0:
+                        break
+                    if on_tarjan_stack[j] and indices[j] < lowlinks[i]:
+                        lowlinks[i] = indices[j]
+                else:
+
+                    # Every dependency of i has been traversed
+                    stack.pop()
+                    next_edges.pop()
+                    if stack and lowlinks[i] < lowlinks[stack[-1]]:
+                        lowlinks[stack[-1]] = lowlinks[i]
+                    if lowlinks[i] == indices[i]:
+                        component = []
+                        while True:
+                            j = tarjan_stack.pop()
+                            on_tarjan_stack[j] = 0
+                            component.append(j)
+                            if j == i:
+                                break
+                        components.append(component)
+                    continue
+
+                # Descend into the dependency j
+                next_edges[-1] = k
+                indices[j] = lowlinks[j] = num_indexed
+                num_indexed += 1
+                tarjan_stack.append(j)
+                on_tarjan_stack[j] = 1
+                stack.append(j)
+                next_edges.append(offsets[j])
+
+        return components
+
+
+    def postorder(self, starts, skip=None):
+        """Search the dependencies of the nodes in [starts] depth first, only
+        visiting the nodes that they depend on, directly or not, and
+        optionally not entering the nodes i whose skip[i] is set
+
+        Returns
+        -------
+        order : list of int
+            The visited nodes, each after all of its visited dependencies,
+            including the nodes of dependencies that aren't items
+
+        cycle : list of int or None
+            If a circular dependency was found, the search stops and this is
+            the chain of dependencies [node, node's dependency, ..., node that
+            depends on the first node], otherwise None
+
+        """
+        dependencies_of = self.dependencies_of
+        finished = {}  # -- node -> False while on the stack, True once done
+        order = []
+        for start in starts:
+            if start in finished or (skip is not None and skip[start]):
+                continue
+            finished[start] = False
+            stack = [(start, iter(dependencies_of(start)))]
+            while stack:
+                i, dependencies = stack[-1]
+                for j in dependencies:
+                    if j not in finished:
+                        if skip is not None and skip[j]:
+                            continue
+                        finished[j] = False
+                        stack.append((j, iter(dependencies_of(j))))
+                        break
+                    if not finished[j]:
+                        path = [k for k, _ in stack]
+                        return order, path[path.index(j):]
+                else:
+                    stack.pop()
+                    finished[i] = True
+                    order.append(i)
+        return order, None
+
+
+    def shortest_path(self, starts, target, within=None):
+        """Find a shortest chain of dependencies from any of the nodes in
+        [starts] to the node [target] with a breadth-first search, optionally
+        only through the nodes in the set [within]
+
+        Returns
+        -------
+        path : list of int or None
+            [start, start's dependency, ..., target], or None if none of
+            [starts] depends on [target]
+
+        """
+        previous_nodes = dict.fromkeys(starts, -1)
+        queue = deque(previous_nodes)
+        while queue:
+            i = queue.popleft()
+            if i == target:
+                path = [i]
+                while previous_nodes[path[-1]] >= 0:
+                    path.append(previous_nodes[path[-1]])
+                return path[::-1]
+            for j in self.dependencies_of(i):
+                if j not in previous_nodes and (within is None or j in within):
+                    previous_nodes[j] = i
+                    queue.append(j)
+        return None
+
+
+class DependencyMapping(Mapping):
+    """A read-only view of a CompactGraph as a dictionary of {item: list of
+    items that this item depends on}, translating node indices back into items
+    whenever an item is looked up
+    """
+
+    __slots__ = ("graph",)
+
+    def __init__(self, graph):
+        self.graph = graph
+
+
+    def __getitem__(self, item):
+        items = self.graph.items
+        return [items[j] for j
+                in self.graph.dependencies_of(self.graph.node(item))]
+
+
+    def __iter__(self):
+        items = self.graph.items
+        return (items[i] for i in self.graph.nodes())
+
+
+    def __len__(self):
+        return self.graph.num_items
+
+
+    def __contains__(self, item):
+        return self.graph.is_item(item)
+
+
+    def __repr__(self):
+        return repr(dict(self))
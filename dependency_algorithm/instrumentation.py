@@ -0,0 +1,113 @@
+"""instrumentation - counters and timings of the work done by a Dependencies
+object, to export to a metrics system
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+
+class Stats(object):
+    """Collects what a Dependencies object does, when passed in as its stats.
+
+    counters       -- a dictionary of {name: count}, with the names:
+                      closure_hits, closure_misses -- lookups of the complete
+                          dependencies that were already computed, or not
+                      closure_updates -- complete dependencies recomputed after
+                          an item was added or modified
+                      disk_cache_hits, disk_cache_misses -- see the disk_cache
+                          module
+                      affected_cache_hits, affected_cache_misses -- see
+                          Dependencies.affected_by
+                      run_cache_hits, run_cache_misses -- items whose results
+                          were or weren't reused, see
+                          Dependencies.execute_incremental
+                      nodes_visited, edges_visited -- items and dependencies
+                          traversed by validation, ordering, closure, cycle,
+                          dependents and reachability searches
+    max_depth      -- the longest chain of dependencies traversed
+    phase_seconds  -- a dictionary of {phase: total wall time in seconds}, for
+                      the phases "validation", "ordering", "closure",
+                      "cycles" and "reachability" (and "read", for reading
+                      the graph in the dependency-algorithm command)
+
+    Nothing is collected without a Stats object, so instrumentation costs
+    nothing unless it is used. Updates take a lock, so threads querying the
+    same object (ex. a FrozenDependencies snapshot) can share its Stats.
+    """
+
+    __slots__ = ("counters", "max_depth", "phase_seconds", "callback",
+                 "_lock")
+
+    def __init__(self, callback=None):
+        """Initialize the Stats object
+
+        Parameters
+        ----------
+        callback : callable (default of None)
+            Optional function called with (phase, seconds) at the end of every
+            phase, ex. to send timings straight to a metrics system
+
+        """
+        self.callback = callback
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        """Set every counter and timing back to zero
+        """
+        with self._lock:
+            self.counters = {}
+            self.max_depth = 0
+            self.phase_seconds = {}
+
+
+    def count(self, name, amount=1):
+        """Add [amount] to the counter [name]
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+
+    def depth(self, depth):
+        """Record that a chain of dependencies [depth] items long was traversed
+        """
+        with self._lock:
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager adding the wall time of its block to phase [name]
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(name, time.perf_counter() - start_time)
+
+
+    def add_seconds(self, name, seconds):
+        """Add [seconds] to phase [name], for phases that are timed in parts
+        instead of in one block
+        """
+        with self._lock:
+            self.phase_seconds[name] = \
+                self.phase_seconds.get(name, 0.0) + seconds
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+
+    def as_dict(self):
+        """Return the counters and timings as a JSON-serializable dictionary
+        """
+        with self._lock:
+            return {"counters": dict(self.counters),
+                    "max_depth": self.max_depth,
+                    "phase_seconds": dict(self.phase_seconds)}
+
+
+    def __repr__(self):
+        return "Stats({})".format(self.as_dict())
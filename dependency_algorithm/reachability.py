@@ -0,0 +1,192 @@
+"""reachability - answer whether one item depends on another, directly or not,
+from a few numbers per item instead of the complete dependencies
+"""
+
+from array import array
+
+
+class ReachabilityIndex(object):
+    """Labels of the nodes of a CompactGraph that decide most "does node i
+    depend on node j?" questions on their own, in O(V) memory for V nodes
+    instead of up to O(V^2) for the complete dependencies. Every label is
+    indexed by node:
+
+    height      -- the length of the longest chain of dependencies below the
+                   node, so i can only depend on j if height[i] > height[j]
+    depth       -- the length of the longest chain of dependents above the
+                   node, so i can only depend on j if depth[i] < depth[j]
+    labelings   -- (post, tree_low, low) arrays from depth-first searches of
+                   the dependencies that visit them in different orders, where
+                   post is the node's rank in the postorder of the search.
+                   Everything a node depends on has a rank between low (the
+                   lowest rank of anything the node depends on) and the node's
+                   own, so i can only depend on j if low[i] <= post[j] <
+                   post[i]. The node's subtree of the search has the ranks
+                   from tree_low up to its own, so i depends on j if
+                   tree_low[i] <= post[j] < post[i].
+    reaches     -- bitsets of the landmarks (the nodes with the most direct
+                   dependencies times direct dependents) that the node is or
+                   depends on
+    reached_by  -- bitsets of the landmarks that are or depend on the node,
+                   so different nodes i and j with a landmark in common in
+                   reaches[i] and reached_by[j] depend on each other
+
+    When the labels don't decide a question, the dependencies of i are
+    searched, skipping every node whose labels rule out j, and stopping at
+    the first node whose labels show that it depends on j.
+    """
+
+    __slots__ = ("graph", "height", "depth", "labelings", "reaches",
+                 "reached_by")
+
+    @classmethod
+    def from_graph(cls, graph, order, num_landmarks=64):
+        """Label the nodes of a graph, with a pass over the nodes in order for
+        each kind of label
+
+        Parameters
+        ----------
+        graph : CompactGraph
+            The graph of direct dependencies, without missing or circular
+            dependencies
+
+        order : sequence of int
+            The nodes of the items, ordered such that every node comes after
+            all of its dependencies
+
+        num_landmarks : int (default of 64)
+            How many nodes to use as landmarks
+
+        Returns
+        -------
+        index : ReachabilityIndex
+            The labels of every node in [order]
+
+        """
+        index = cls()
+        index.graph = graph
+        num_nodes = graph.num_nodes
+        dependencies_of = graph.dependencies_of
+        height = array("i", [0]) * num_nodes
+        num_dependents = [0] * num_nodes
+        for i in order:
+            for j in dependencies_of(i):
+                num_dependents[j] += 1
+                if height[j] >= height[i]:
+                    height[i] = height[j] + 1
+        depth = array("i", [0]) * num_nodes
+        for i in reversed(order):
+            for j in dependencies_of(i):
+                if depth[i] >= depth[j]:
+                    depth[j] = depth[i] + 1
+        index.height, index.depth = height, depth
+
+        # Search from the nodes that nothing depends on, so that every node
+        # is reached from one of them
+        roots = [i for i in order if not num_dependents[i]]
+        index.labelings = [
+            cls._label(graph, roots, dependencies_of),
+            cls._label(graph, roots[::-1], lambda i: dependencies_of(i)[::-1])]
+
+        landmarks = sorted(
+            order, key=lambda i: -num_dependents[i] * len(dependencies_of(i))
+        )[:num_landmarks]
+        landmark_bits = {i: 1 << bit for bit, i in enumerate(landmarks)}
+        reaches = [0] * num_nodes
+        for i in order:
+            bits = landmark_bits.get(i, 0)
+            for j in dependencies_of(i):
+                bits |= reaches[j]
+            reaches[i] = bits
+        reached_by = [0] * num_nodes
+        for i in reversed(order):
+            bits = reached_by[i] = reached_by[i] | landmark_bits.get(i, 0)
+            for j in dependencies_of(i):
+                reached_by[j] |= bits
+        index.reaches, index.reached_by = reaches, reached_by
+        return index
+
+
+    @staticmethod
+    def _label(graph, roots, children_of):
+        """Return the (post, tree_low, low) arrays of a depth-first search of
+        the dependencies of [roots], visiting the dependencies of each node in
+        the order of children_of(node)
+        """
+        num_nodes = graph.num_nodes
+        dependencies_of = graph.dependencies_of
+        post = array("i", [-1]) * num_nodes
+        tree_low = array("i", [0]) * num_nodes
+        low = array("i", [0]) * num_nodes
+        rank = 0
+        for root in roots:
+            tree_low[root] = rank
+            post[root] = -2  # -- on the stack
+            stack = [(root, iter(children_of(root)))]
+            while stack:
+                i, children = stack[-1]
+                for j in children:
+                    if post[j] == -1:
+                        tree_low[j] = rank
+                        post[j] = -2
+                        stack.append((j, iter(children_of(j))))
+                        break
+                else:
+                    stack.pop()
+                    lowest = tree_low[i]
+                    for j in dependencies_of(i):
+                        if low[j] < lowest:
+                            lowest = low[j]
+                    low[i] = lowest
+                    post[i] = rank
+                    rank += 1
+        return post, tree_low, low
+
+
+    def _decide(self, i, j):
+        """Return False if the labels rule out node [i] depending on node [j],
+        True if they show that it does, and None if they can't tell
+        """
+        if self.height[i] <= self.height[j] or self.depth[i] >= self.depth[j]:
+            return False
+        for post, _, low in self.labelings:
+            if not low[i] <= post[j] < post[i]:
+                return False
+        if self.reaches[i] & self.reached_by[j]:
+            return True
+        for post, tree_low, _ in self.labelings:
+            if tree_low[i] <= post[j]:
+                return True
+        return None
+
+
+    def contains(self, i, j):
+        """Whether node [i] depends, directly or not, on node [j]
+        """
+        decided = self._decide(i, j)
+        if decided is not None:
+            return decided
+
+        decide = self._decide
+        dependencies_of = self.graph.dependencies_of
+        searched = {i}
+        stack = [i]
+        while stack:
+            for k in dependencies_of(stack.pop()):
+                if k == j:
+                    return True
+                if k in searched:
+                    continue
+                searched.add(k)
+                decided = decide(k, j)
+                if decided:
+                    return True
+                if decided is None:
+                    stack.append(k)
+        return False
+
+
+    def depends_on(self, item, dependency):
+        """Whether item [item] depends, directly or not, on [dependency]
+        """
+        return self.contains(self.graph.node(item), self.graph.node(dependency))
@@ -0,0 +1,371 @@
+"""run_cache - the results of items' tasks, saved under fingerprints of the
+items' inputs and the fingerprints of their dependencies, so that a re-run
+only runs the tasks of items whose inputs, or whose dependencies' inputs, have
+changed since the last run
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+def fingerprints(order, dependencies_of, items, digests):
+    """Fingerprint every node from the item, the digest of its inputs and the
+    fingerprints of its direct dependencies, with one pass over the nodes in
+    [order], so a node's fingerprint changes whenever anything it depends on,
+    directly or not, changes
+
+    Parameters
+    ----------
+    order : sequence of int
+        The nodes, ordered such that every node comes after all of its
+        dependencies
+
+    dependencies_of : callable
+        Function of a node returning its direct dependencies
+
+    items : list
+        The item of every node, indexed by node
+
+    digests : dict
+        A dictionary of {node: str or bytes digest of the node's inputs}
+
+    Returns
+    -------
+    fingerprints : dict
+        A dictionary of {node: hex digest}
+
+    """
+    node_fingerprints = {}
+    for i in order:
+        digest = digests[i]
+        if isinstance(digest, str):
+            digest = digest.encode("utf-8", "surrogatepass")
+        hasher = hashlib.sha256()
+        hasher.update(repr(items[i]).encode("utf-8", "surrogatepass"))
+        hasher.update(b"\0")
+        hasher.update(hashlib.sha256(digest).digest())
+
+        # Sorted, so the order the dependencies were listed in doesn't matter
+        for fingerprint in sorted(node_fingerprints[j]
+                                  for j in dependencies_of(i)):
+            hasher.update(bytes.fromhex(fingerprint))
+        node_fingerprints[i] = hasher.hexdigest()
+    return node_fingerprints
+
+
+class RunCache(object):
+    """Pickled results of tasks, stored under the fingerprints of their items
+    (see fingerprints). Subclasses decide where the results are stored.
+
+    The bytes stored are counted once, the first time a result is stored, and
+    then kept as a running total, less the size of any result that is stored
+    over. Once the stored results take up more than
+    max_bytes, the least recently used are evicted until they take up at most
+    nine tenths of it, which looks at every stored result, so eviction only
+    happens after every so many results instead of after each one. Results
+    stored by other processes sharing the cache are only counted at the next
+    eviction.
+    """
+
+    def __init__(self, max_bytes=None):
+        """Initialize the RunCache object
+
+        Parameters
+        ----------
+        max_bytes : int (default of None)
+            The most bytes of pickled results to keep, when None nothing is
+            ever evicted
+
+        """
+        assert max_bytes is None or \
+            (isinstance(max_bytes, int) and max_bytes >= 0), \
+            '[max_bytes] must be None or a non-negative int'
+        self.max_bytes = max_bytes
+        self._num_bytes = None  # -- counted when first needed
+
+
+    def get(self, fingerprint):
+        """Return (True, result) if there is a result stored under
+        [fingerprint], marking it as the most recently used, otherwise
+        (False, None). A result that can't be unpickled any more (ex. its
+        class was renamed, or the file was cut short) is deleted and counts
+        as not stored.
+        """
+        value = self._load(fingerprint)
+        if value is None:
+            return False, None
+        try:
+            return True, pickle.loads(value)
+        except (pickle.UnpicklingError, AttributeError, ImportError,
+                EOFError, ValueError):
+            deleted_bytes = self._delete(fingerprint)
+            if self._num_bytes is not None:
+                self._num_bytes -= deleted_bytes
+            return False, None
+
+
+    def put(self, fingerprint, result):
+        """Store [result] under [fingerprint], then evict the least recently
+        used results if the cache has grown past max_bytes. Returns False,
+        storing nothing, if the result can't be pickled.
+        """
+        try:
+            value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        replaced_bytes = self._store(fingerprint, value)
+        if self.max_bytes is not None:
+            if self._num_bytes is None:
+                self._num_bytes = self._total_bytes()
+            else:
+                self._num_bytes += len(value) - replaced_bytes
+            if self._num_bytes > self.max_bytes:
+                self._num_bytes = self._evict(self.max_bytes * 9 // 10)
+        return True
+
+
+    def _load(self, fingerprint):
+        """Return the pickled result stored under [fingerprint], or None,
+        marking it as the most recently used
+        """
+        raise NotImplementedError
+
+
+    def _store(self, fingerprint, value):
+        """Store the pickled result [value] under [fingerprint], returning the
+        size of the result it replaced, or 0 if there wasn't one
+        """
+        raise NotImplementedError
+
+
+    def _delete(self, fingerprint):
+        """Delete the result stored under [fingerprint], returning its size,
+        or 0 if there wasn't one
+        """
+        raise NotImplementedError
+
+
+    def _total_bytes(self):
+        """Return how many bytes the stored results take up
+        """
+        raise NotImplementedError
+
+
+    def _evict(self, max_bytes):
+        """Delete the least recently used results until the rest take up at
+        most [max_bytes], returning how many bytes they take up
+        """
+        raise NotImplementedError
+
+
+class DirectoryRunCache(RunCache):
+    """A RunCache with one file per result in a directory, where each file's
+    modification time is when its result was last used
+    """
+
+    def __init__(self, path, max_bytes=None):
+        """Initialize the DirectoryRunCache object
+
+        Parameters
+        ----------
+        path : str
+            The directory to store the results in, created if it doesn't
+            exist
+
+        max_bytes : int (default of None)
+            See RunCache
+
+        """
+        RunCache.__init__(self, max_bytes)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+
+    def _file(self, fingerprint):
+        return os.path.join(self.path, fingerprint + ".result")
+
+
+    def _load(self, fingerprint):
+        path = self._file(fingerprint)
+        try:
+            with open(path, "rb") as result_file:
+                value = result_file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+
+    def _store(self, fingerprint, value):
+
+        path = self._file(fingerprint)
+        try:
+            replaced_bytes = os.stat(path).st_size
+        except OSError:
+            replaced_bytes = 0
+
+        # Written next to the result's file and then moved into place, so
+        # other processes never see part of it
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(file_descriptor, "wb") as result_file:
+                result_file.write(value)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        return replaced_bytes
+
+
+    def _delete(self, fingerprint):
+        path = self._file(fingerprint)
+        try:
+            deleted_bytes = os.stat(path).st_size
+            os.unlink(path)
+        except OSError:
+            return 0
+        return deleted_bytes
+
+
+    def _entries(self):
+        """Return a (last used, path, size) tuple for every stored result
+        """
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".result"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+
+    def _total_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+
+    def _evict(self, max_bytes):
+        entries = self._entries()
+        total_bytes = sum(size for _, _, size in entries)
+        if total_bytes <= max_bytes:
+            return total_bytes
+        entries.sort()
+        for _, path, size in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            if total_bytes <= max_bytes:
+                break
+        return total_bytes
+
+
+class SQLiteRunCache(RunCache):
+    """A RunCache in a single SQLite database file, with a row per result
+    recording its size and when it was last used. One connection is kept
+    open and shared by every thread, one statement at a time.
+    """
+
+    def __init__(self, path, max_bytes=None):
+        """Initialize the SQLiteRunCache object
+
+        Parameters
+        ----------
+        path : str
+            The database file to store the results in, created if it doesn't
+            exist
+
+        max_bytes : int (default of None)
+            See RunCache
+
+        """
+        RunCache.__init__(self, max_bytes)
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30,
+                                           check_same_thread=False)
+        self._lock = threading.Lock()
+
+        # Losing the last few results in a power failure only means running
+        # their tasks again, so commits don't wait for the disk
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (fingerprint TEXT PRIMARY "
+                "KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used "
+                "REAL NOT NULL)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results "
+                "(last_used)")
+
+
+    def close(self):
+        """Close the connection to the database
+        """
+        with self._lock:
+            self._connection.close()
+
+
+    def _load(self, fingerprint):
+        with self._lock, self._connection as connection:
+            row = connection.execute(
+                "SELECT value FROM results WHERE fingerprint = ?",
+                (fingerprint,)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE results SET last_used = ? WHERE fingerprint = ?",
+                (time.time(), fingerprint))
+        return bytes(row[0])
+
+
+    def _store(self, fingerprint, value):
+        with self._lock, self._connection as connection:
+            row = connection.execute(
+                "SELECT size FROM results WHERE fingerprint = ?",
+                (fingerprint,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (fingerprint, value, len(value), time.time()))
+        return 0 if row is None else row[0]
+
+
+    def _delete(self, fingerprint):
+        with self._lock, self._connection as connection:
+            row = connection.execute(
+                "SELECT size FROM results WHERE fingerprint = ?",
+                (fingerprint,)).fetchone()
+            connection.execute(
+                "DELETE FROM results WHERE fingerprint = ?", (fingerprint,))
+        return 0 if row is None else row[0]
+
+
+    def _total_bytes(self):
+        with self._lock, self._connection as connection:
+            return connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+
+    def _evict(self, max_bytes):
+        total_bytes = self._total_bytes()
+        if total_bytes <= max_bytes:
+            return total_bytes
+        with self._lock, self._connection as connection:
+            evicted = []
+            for fingerprint, size in connection.execute(
+                    "SELECT fingerprint, size FROM results ORDER BY "
+                    "last_used"):
+                evicted.append((fingerprint,))
+                total_bytes -= size
+                if total_bytes <= max_bytes:
+                    break
+            connection.executemany(
+                "DELETE FROM results WHERE fingerprint = ?", evicted)
+        return total_bytes
@@ -0,0 +1,120 @@
+"""scheduling - critical path analysis and simulated schedules of items that
+take different amounts of time to resolve, over the nodes of a CompactGraph
+"""
+
+import heapq
+
+
+def timings(order, dependencies_of, durations):
+    """Find the earliest and latest times that each node can start without
+    delaying the whole graph, with one pass over the nodes in [order] to find
+    the earliest start times, and one pass back for the latest start times
+
+    Parameters
+    ----------
+    order : sequence of int
+        The nodes, ordered such that every node comes after all of its
+        dependencies
+
+    dependencies_of : callable
+        Function of a node returning its direct dependencies
+
+    durations : dict
+        A dictionary of {node: duration}, with the duration of every node
+
+    Returns
+    -------
+    earliest_starts, latest_starts : dict
+        Dictionaries of {node: time}, where nodes whose earliest and latest
+        start times are the same are on a critical path
+
+    critical_dependencies : dict
+        A dictionary of {node: the dependency that finishes last, or -1 if
+        the node doesn't have any}, to follow a critical path back to its
+        start
+
+    makespan : float
+        The length of the critical path, when the last node finishes
+
+    """
+    earliest_starts = {}
+    earliest_finishes = {}
+    critical_dependencies = {}
+    for i in order:
+        start, critical_dependency = 0, -1
+        for j in dependencies_of(i):
+            if earliest_finishes[j] > start or critical_dependency < 0:
+                start, critical_dependency = earliest_finishes[j], j
+        earliest_starts[i] = start
+        earliest_finishes[i] = start + durations[i]
+        critical_dependencies[i] = critical_dependency
+    makespan = max(earliest_finishes.values(), default=0)
+
+    # Each node has to finish before the latest start of all of its dependents
+    latest_finishes = dict.fromkeys(order, makespan)
+    latest_starts = {}
+    for i in reversed(order):
+        latest_starts[i] = latest_start = latest_finishes[i] - durations[i]
+        for j in dependencies_of(i):
+            if latest_start < latest_finishes[j]:
+                latest_finishes[j] = latest_start
+    return earliest_starts, latest_starts, critical_dependencies, makespan
+
+
+def list_schedule(order, dependencies_of, dependents_of, durations,
+                  priorities, num_workers):
+    """Simulate running the nodes on [num_workers] workers with list
+    scheduling: whenever a worker is free, it starts the ready node (whose
+    dependencies have all finished) with the lowest priority, and ties are
+    broken by [order]
+
+    Parameters
+    ----------
+    order : sequence of int
+        The nodes, ordered such that every node comes after all of its
+        dependencies
+
+    dependencies_of, dependents_of : callable
+        Functions of a node returning its direct dependencies and dependents
+
+    durations : dict
+        A dictionary of {node: duration}, with the duration of every node
+
+    priorities : dict
+        A dictionary of {node: priority}, ex. the latest start times from
+        timings, so that the nodes on the critical path start first
+
+    num_workers : int
+        How many nodes can run at the same time
+
+    Returns
+    -------
+    starts : dict
+        A dictionary of {node: simulated start time}, in the order the nodes
+        start
+
+    makespan : float
+        When the last node finishes
+
+    """
+    remaining_dependencies = {i: len(dependencies_of(i)) for i in order}
+    positions = {i: position for position, i in enumerate(order)}
+    ready = [(priorities[i], positions[i], i) for i in order
+             if not remaining_dependencies[i]]
+    heapq.heapify(ready)
+    running = []  # -- heap of (finish time, position, node)
+    starts = {}
+    time = makespan = 0
+    while ready or running:
+        while ready and len(running) < num_workers:
+            _, position, i = heapq.heappop(ready)
+            starts[i] = time
+            heapq.heappush(running, (time + durations[i], position, i))
+        time, _, i = heapq.heappop(running)
+        makespan = max(makespan, time)
+        for dependent in dependents_of(i):
+            remaining_dependencies[dependent] -= 1
+            if not remaining_dependencies[dependent]:
+                heapq.heappush(ready, (priorities[dependent],
+                                       positions[dependent], dependent))
+    return starts, makespan
@@ -48,6 +48,10 @@ setup(
     author_email=__email__,
     packages=["dependency_algorithm"],
     install_requires=install_requires,
+    extras_require={"numpy": ["numpy"]},
+    entry_points={
+        "console_scripts": ["dependency-algorithm=dependency_algorithm.cli:main"]
+    },
     download_url='{}/archive/v{}.tar.gz'.format(
         __uri__, __version__),
     keywords=["dependency", "dependencies", "dependency management"],
@@ -0,0 +1,79 @@
+"""test_cli.py - tests for the dependency-algorithm command
+"""
+
+import json
+
+from dependency_algorithm.cli import main
+
+from .test_dependency_algorithm import items_0_mistakes, items_2_mistakes
+
+
+def test_cli(tmp_path, capsys):
+    """Each command reads the graph from a file and writes a line of JSON per
+    result, with a non-zero exit status for graphs that aren't valid
+    """
+    graph = tmp_path / "graph.jsonl"
+    graph.write_text("".join(
+        json.dumps({"item": item, "dependencies": dependencies}) + "\n"
+        for item, dependencies in items_0_mistakes.items()))
+
+    assert main(["order", str(graph)]) == 0
+    order = [json.loads(line) for line in capsys.readouterr().out.split()]
+    assert sorted(order) == sorted(items_0_mistakes)
+
+    assert main(["closure", str(graph), "--stats"]) == 0
+    captured = capsys.readouterr()
+    closure = [json.loads(line) for line in captured.out.splitlines()]
+    assert [record["item"] for record in closure] == order
+    assert {record["item"]: set(record["dependencies"])
+            for record in closure}["A"] == set("BCDEF")
+    report = json.loads(captured.err)
+    assert {"read", "closure"} <= set(report["phase_seconds"])
+    assert report["max_depth"] == 6
+
+    assert main(["dependents", str(graph), "E", "--direct"]) == 0
+    assert capsys.readouterr().out.split() == ['"D"']
+
+    edges = tmp_path / "graph.csv"
+    edges.write_text("".join(
+        "{},{}\n".format(item, dependency)
+        for item, dependencies in items_2_mistakes.items()
+        for dependency in dependencies or [""]))
+    assert main(["validate", str(edges)]) == 1
+    problems = [json.loads(line)["problem"]
+                for line in capsys.readouterr().out.splitlines()]
+    assert problems == ["missing_dependencies", "cycles"]
+    assert main(["levels", str(edges)]) == 1
+    assert "Non-existant" in capsys.readouterr().err
+
+    # Repeated dependencies are reported without making the graph invalid
+    repeated = tmp_path / "repeated.json"
+    repeated.write_text(json.dumps({"A": ["B", "B"], "B": []}))
+    assert main(["validate", str(repeated)]) == 0
+    assert json.loads(capsys.readouterr().out)["problem"] == \
+        "duplicate_dependencies"
+
+    # Missing dependencies of a JSON graph can be made into items as well
+    missing = tmp_path / "missing.json"
+    missing.write_text(json.dumps({"A": ["B"]}))
+    assert main(["validate", str(missing)]) == 1
+    capsys.readouterr()
+    assert main(["order", str(missing), "--add-missing"]) == 0
+    assert capsys.readouterr().out.split() == ['"B"', '"A"']
+
+    # Files that can't be read are reported in one line
+    bad = tmp_path / "bad.json"
+    bad.write_text("{")
+    no_item = tmp_path / "no_item.jsonl"
+    no_item.write_text(json.dumps({"dependencies": []}) + "\n")
+    unhashable = tmp_path / "unhashable.json"
+    unhashable.write_text(json.dumps({"A": [["B"]]}))
+    too_long = tmp_path / "too_long.csv"
+    too_long.write_text('A,"{}"\n'.format("B" * 200000))
+    for path in (bad, tmp_path / "nowhere.csv", no_item, unhashable, 
+                 too_long):
+        assert main(["order", str(path), "--add-missing"]) == 1
+        err = capsys.readouterr().err
+        assert len(err.splitlines()) == 1 and "can't read" in err
+    assert main(["dependents", str(graph), "Q"]) == 1
+    assert "Q" in capsys.readouterr().err
@@ -1,9 +1,25 @@
 """test_dependency_algorithm.py - tests :)
 """
 
-from dependency_algorithm import Dependencies
+from concurrent.futures import ThreadPoolExecutor
+import json
+from math import factorial
+import random
+
+from dependency_algorithm import (
+    CircularDependencyException,
+    Dependencies,
+    FrozenDependencies,
+    MissingDependencyException,
+    Stats
+)
 import pytest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 ################################################################################
 # Data structures to use in these tests
@@ -106,6 +122,15 @@ def test_complete_dependencies_check():
     class_set_dict = \
         {k: set(v) for k, v in deps.complete_dependencies_dict().items()}
     assert items_0_mistakes_complete_set_dict == class_set_dict
+    assert isinstance(deps.complete_dependencies_dict(), dict)
+    assert json.loads(json.dumps(deps.complete_dependencies_dict())) == \
+        deps.complete_dependencies_dict()
+
+    # Does deps.iter_complete_dependencies work, in an order that resolves?
+    streamed = list(Dependencies(items_0_mistakes).iter_complete_dependencies())
+    assert [item for item, _ in streamed] in \
+        items_0_mistakes_all_possible_correct
+    assert {k: set(v) for k, v in streamed} == class_set_dict
 
 
 def test_dependency_resolution():
@@ -124,3 +149,498 @@ def test_all_possible_correct_orderings():
     all_possible_correct_orderings = deps.all_possible_resolution_orders()
     assert set(all_possible_correct_orderings) == \
         set([tuple(x) for x in items_0_mistakes_all_possible_correct])
+
+
+def test_deep_chain_of_dependencies():
+    """A chain of dependencies much longer than Python's recursion limit can be
+    completed and resolved
+    """
+    chain_length = 3000
+    chain = {i: [i - 1] if i > 0 else [] for i in range(chain_length)}
+    deps = Dependencies(chain)
+    assert set(deps.complete_dependencies(chain_length - 1)) == \
+        set(range(chain_length - 1))
+    assert deps.resolve_dependencies() == list(range(chain_length))
+
+
+def test_bitset_closure_mode():
+    """The bitset closure mode gives the same complete dependencies and a 
+    correct ordering
+    """
+    deps = Dependencies(items_0_mistakes, closure_mode="bitset")
+    class_set_dict = \
+        {k: set(v) for k, v in deps.complete_dependencies_dict().items()}
+    assert class_set_dict == \
+        {k: set(v) for k, v in items_0_mistakes_complete.items()}
+    assert deps.resolve_dependencies() in items_0_mistakes_all_possible_correct
+    assert deps.complete_dependencies_closure().depends_on('Z', 'F')
+    assert not deps.complete_dependencies_closure().depends_on('F', 'Z')
+    assert repr(deps.complete_dependencies_closure()) == \
+        repr(deps.complete_dependencies_dict())
+    assert not Dependencies(items_1_mistakes, closure_mode="bitset")\
+        .no_circular_dependencies()
+
+
+def test_compact_graph():
+    """Items are interned to nodes in input order, missing dependencies are
+    nodes that aren't items, and lookups translate nodes back into items
+    """
+    deps = Dependencies(items_2_mistakes)
+    graph = deps._graph
+    assert graph.items[:len(items_2_mistakes)] == list(items_2_mistakes)
+    assert 'Y' in graph.index and 'Y' not in deps.dependencies
+    assert deps.possible_items == list(items_2_mistakes)
+    assert dict(deps.dependencies) == items_2_mistakes
+    assert not deps.dependencies_exist(verbose=False)
+
+    deps = Dependencies(items_0_mistakes)
+    assert deps.complete_dependencies('A') == ['B', 'C', 'D', 'E', 'F']
+    assert deps.complete_dependencies_closure().depends_on('A', 'F')
+    assert not deps.complete_dependencies_closure().depends_on('F', 'A')
+
+
+def test_dependency_resolution_tie_breaking():
+    """Ties between items that are ready at the same time are broken by the 
+    input order of the items, or by a priority function
+    """
+    deps = Dependencies(items_0_mistakes)
+    assert deps.resolve_dependencies() == ['B', 'F', 'E', 'D', 'C', 'A', 'Z']
+    assert deps.resolve_dependencies(key=lambda item: item != 'F') == \
+        ['F', 'B', 'E', 'D', 'C', 'A', 'Z']
+    with pytest.raises(CircularDependencyException):
+        Dependencies(items_1_mistakes).resolve_dependencies()
+    with pytest.raises(MissingDependencyException):
+        Dependencies(items_2_mistakes).resolve_dependencies()
+
+
+def test_lazy_resolution_orders():
+    """Orderings are generated lazily, so the first few orderings of a graph
+    with far too many orderings to list can still be produced
+    """
+    deps = Dependencies({i: [] for i in range(50)})
+    orderings = list(deps.iter_resolution_orders(limit=5))
+    assert len(orderings) == len(set(orderings)) == 5
+    assert all(sorted(ordering) == list(range(50)) for ordering in orderings)
+    deps = Dependencies(items_0_mistakes)
+    assert list(deps.iter_resolution_orders(limit=2)) == \
+        deps.all_possible_resolution_orders()[:2]
+
+
+def test_count_and_sample_resolution_orders():
+    """Counting orderings agrees with listing them, and sampled orderings are
+    correct
+    """
+    deps = Dependencies(items_0_mistakes)
+    assert deps.count_resolution_orders() == 3
+    rng = random.Random(0)
+    samples = {deps.sample_resolution_order(rng) for _ in range(100)}
+    assert samples == \
+        set([tuple(x) for x in items_0_mistakes_all_possible_correct])
+
+    # Independent groups of items are counted without enumerating them
+    deps = Dependencies({i: [] for i in range(30)})
+    assert deps.count_resolution_orders() == factorial(30)
+    assert sorted(deps.sample_resolution_order(0)) == list(range(30))
+
+
+def test_add_remove_modify_items():
+    """Adding, removing and modifying items keeps the cached ordering and
+    complete dependencies correct
+    """
+    deps = Dependencies(items_0_mistakes)
+    deps.resolve_dependencies()
+    deps.complete_dependencies_dict()
+
+    deps.add_item('G', ['Z'])
+    assert set(deps.complete_dependencies('G')) == \
+        set(items_0_mistakes_complete['Z']) | {'Z'}
+    deps.modify_item('F', ['B'])
+    assert set(deps.complete_dependencies('E')) == {'F', 'B'}
+    assert 'B' in deps.complete_dependencies('Z')
+    ordering = deps.resolve_dependencies()
+    assert ordering.index('B') < ordering.index('F') < ordering.index('E')
+
+    with pytest.raises(CircularDependencyException):
+        deps.modify_item('B', ['G'])
+    with pytest.raises(MissingDependencyException):
+        deps.add_item('H', ['Y'])
+    with pytest.raises(ValueError):
+        deps.remove_item('Z')
+    deps.remove_item('G')
+
+    # A missing dependency that is added can't depend on its dependents
+    missing_deps = Dependencies({'Z': ['Y']})
+    with pytest.raises(CircularDependencyException):
+        missing_deps.add_item('Y', ['Z'])
+    assert 'Y' not in missing_deps.dependencies
+    missing_deps.add_item('Y')
+    assert missing_deps.resolve_dependencies() == ['Y', 'Z']
+
+    fresh_deps = Dependencies(deps.dependencies)
+    assert fresh_deps.is_correct_ordering(
+        deps.resolve_dependencies())
+    assert {k: set(v) for k, v in deps.complete_dependencies_dict().items()} \
+        == {k: set(v) for k, v in 
+            fresh_deps.complete_dependencies_dict().items()}
+
+
+def test_resolve_levels():
+    """Items are grouped into levels that only depend on earlier levels
+    """
+    deps = Dependencies(items_0_mistakes)
+    assert deps.resolve_levels() == \
+        [['B', 'F'], ['E'], ['D'], ['C'], ['A'], ['Z']]
+    deps = Dependencies({'A': [], 'B': ['A'], 'C': ['A'], 'D': []})
+    assert deps.resolve_levels() == [['A', 'D'], ['B', 'C']]
+    with pytest.raises(CircularDependencyException):
+        Dependencies(items_1_mistakes).resolve_levels()
+
+
+def test_find_cycles():
+    """Every circular dependency is reported, with a concrete cycle, both by 
+    find_cycles and by the exception
+    """
+    deps = Dependencies(items_1_mistakes)
+    cycles = [{'items': ['A', 'C', 'D', 'E'], 'cycle': ['A', 'D', 'E', 'A']}]
+    assert deps.find_cycles() == cycles
+    with pytest.raises(CircularDependencyException) as exception_info:
+        deps.resolve_dependencies()
+    assert exception_info.value.cycles == cycles
+
+    deps = Dependencies({'A': ['A'], 'B': ['C'], 'C': ['B', 'D'], 'D': []})
+    assert deps.find_cycles() == [
+        {'items': ['A'], 'cycle': ['A', 'A']}, 
+        {'items': ['B', 'C'], 'cycle': ['B', 'C', 'B']}
+    ]
+    assert Dependencies(items_0_mistakes).find_cycles() == []
+
+
+def test_validate(capsys):
+    """validate reports every problem at once without printing anything
+    """
+    report = Dependencies(items_2_mistakes).validate()
+    assert not report["valid"]
+    assert report["missing_dependencies"] == [('Z', 'Y')]
+    assert [cycle["items"] for cycle in report["cycles"]] == \
+        [['A', 'C', 'D', 'E']]
+    assert report["isolated_items"] == ['F']
+    assert report["self_dependencies"] == []
+    assert report["duplicate_dependencies"] == []
+
+    report = Dependencies({'A': ['A', 'B', 'B', 'B'], 'B': []}).validate()
+    assert report["self_dependencies"] == ['A']
+    assert report["cycles"] == [{"items": ['A'], "cycle": ['A', 'A']}]
+    assert report["duplicate_dependencies"] == [('A', 'B'), ('A', 'B')]
+
+    assert Dependencies(items_0_mistakes).validate() == {
+        "valid": True, "missing_dependencies": [], "self_dependencies": [],
+        "cycles": [], "duplicate_dependencies": [], "isolated_items": []}
+
+    # Completing the dependencies names the missing one instead of printing
+    with pytest.raises(MissingDependencyException, match=r"\(Z, Y\)"):
+        Dependencies(items_2_mistakes).complete_dependencies_dict()
+    assert capsys.readouterr().out == ""
+
+
+def test_check_orderings():
+    """Orderings are checked against the direct dependencies, one at a time 
+    or in a batch, with or without NumPy
+    """
+    deps = Dependencies(items_0_mistakes)
+    orderings = items_0_mistakes_all_possible_correct + [
+        ['B', 'F', 'E', 'D', 'A', 'C', 'Z'],  # -- A before C
+        ['B', 'F', 'E', 'D', 'C', 'A'],  # -- leaving out Z is fine
+        ['B', 'E', 'D', 'C', 'A'],  # -- leaving out F isn't
+        ['B', 'F', 'E', 'D', 'C', 'A', 'B', 'Z'],
+    ]
+    expected = [True] * len(items_0_mistakes_all_possible_correct) + \
+        [False, True, False, True]
+    assert [deps.is_correct_ordering(ordering) for ordering in orderings] \
+        == expected
+    assert deps.check_orderings(orderings, use_numpy=False) == expected
+    assert deps._known_dependencies is None
+    if numpy is not None:
+        assert deps.check_orderings(iter(orderings), use_numpy=True) == \
+            expected
+
+    # A repeated item pushes C past the number of items, but A is still left 
+    # out before it
+    deps = Dependencies({'A': [], 'B': [], 'C': ['A', 'B']})
+    for use_numpy in (False, True) if numpy is not None else (False,):
+        assert deps.check_orderings([['B', 'B', 'B', 'C']], 
+                                    use_numpy=use_numpy) == [False]
+
+    assert not Dependencies(items_1_mistakes).is_correct_ordering(
+        ['B', 'F', 'E', 'D', 'C', 'A', 'Z'])
+    with pytest.raises(MissingDependencyException):
+        Dependencies(items_2_mistakes).check_orderings([])
+
+
+def test_dependents_and_affected_by():
+    """Dependents are the reverse of the complete dependencies, and the items
+    affected by a change come out in an order that resolves them
+    """
+    deps = Dependencies(items_0_mistakes)
+    for item in items_0_mistakes:
+        assert set(deps.dependents(item)) == {
+            other for other, complete in items_0_mistakes_complete.items() 
+            if item in complete}
+    assert deps.dependents('E') == ['D', 'C', 'A', 'Z']
+    assert deps.dependents('D', transitive=False) == ['A', 'C', 'Z']
+    assert deps.affected_by(['F', 'C']) == ['F', 'E', 'D', 'C', 'A', 'Z']
+    assert deps.affected_by(['Z']) == ['Z']
+
+    # Edits clear the cached results
+    deps.add_item('G', ['C'])
+    assert deps.affected_by(['F', 'C']) == ['F', 'E', 'D', 'C', 'A', 'Z', 'G']
+    with pytest.raises(KeyError):
+        deps.dependents('Y')
+
+
+def test_disk_cache(tmp_path):
+    """Complete dependencies, orderings and levels saved to a cache directory
+    are read back by another object with the same dependencies, and not by 
+    one with different dependencies
+    """
+    deps = Dependencies(items_0_mistakes, cache_dir=str(tmp_path))
+    complete = dict(deps.complete_dependencies_dict())
+    assert len(list(tmp_path.iterdir())) == 1
+
+    for closure_mode in Dependencies.closure_modes:
+        cached_deps = Dependencies(items_0_mistakes, closure_mode=closure_mode,
+                                   cache_dir=str(tmp_path))
+        assert cached_deps._load_disk_cache() is not None
+        assert dict(cached_deps.complete_dependencies_dict()) == complete
+        assert cached_deps.resolve_dependencies() == \
+            deps.resolve_dependencies()
+        assert cached_deps.resolve_levels() == deps.resolve_levels()
+
+        # Edits still update the complete dependencies read from the cache
+        cached_deps.add_item('G', ['C'])
+        assert set(cached_deps.complete_dependencies('G')) == \
+            {'B', 'C', 'D', 'E', 'F'}
+
+    changed_items = dict(items_0_mistakes, G=['Z'])
+    assert Dependencies(changed_items, cache_dir=str(tmp_path))\
+        ._load_disk_cache() is None
+
+
+def test_streaming_loaders(tmp_path):
+    """Dependencies loaded from edges, CSV and JSON lines match the ones built
+    from a dictionary, with repeated edges dropped and missing dependencies 
+    reported
+    """
+    edges = [(item, dependency) for item, dependencies 
+             in items_0_mistakes.items() for dependency in dependencies]
+    edges += [('B', None), ('F', None), ('A', 'B')]
+    deps = Dependencies.from_edges(edges)
+    assert {item: set(deps.dependencies[item]) for item in deps.dependencies} \
+        == {item: set(dependencies) 
+            for item, dependencies in items_0_mistakes.items()}
+    assert deps.dependencies['A'] == ['B', 'C', 'D']
+    assert deps.resolve_dependencies() in items_0_mistakes_all_possible_correct
+
+    csv_path = tmp_path / "edges.csv"
+    csv_path.write_text("item,dependency\nA,B\nA,C\nB,\nC,Y\nA,B\n")
+    deps = Dependencies.from_csv(str(csv_path), header=True)
+    assert dict(deps.dependencies) == {'A': ['B', 'C'], 'B': [], 'C': ['Y']}
+    assert deps.missing_dependencies() == [('C', 'Y')]
+    with pytest.raises(MissingDependencyException):
+        deps.resolve_dependencies()
+    deps = Dependencies.from_csv(str(csv_path), header=True, add_missing=True)
+    assert deps.resolve_dependencies() == ['B', 'Y', 'C', 'A']
+
+    jsonl_path = tmp_path / "items.jsonl"
+    jsonl_path.write_text('{"item": "A", "dependencies": ["B"]}\n'
+                          '{"item": "B"}\n\n["C", "A"]\n')
+    deps = Dependencies.from_jsonl(str(jsonl_path), closure_mode="bitset")
+    assert dict(deps.dependencies) == {'A': ['B'], 'B': [], 'C': ['A']}
+    assert deps.complete_dependencies('C') == ['A', 'B']
+
+
+def test_stats():
+    """A Stats object counts cache hits and misses and the work done, and 
+    times each phase
+    """
+    phases = []
+    stats = Stats(callback=lambda phase, seconds: phases.append(phase))
+    deps = Dependencies(items_0_mistakes, stats=stats)
+    deps.complete_dependencies_dict()
+    deps.complete_dependencies('A')
+    deps.complete_dependencies('Z')
+    assert stats.counters['closure_misses'] == 1
+    assert stats.counters['closure_hits'] == 2
+    assert stats.counters['nodes_visited'] == 2 * len(items_0_mistakes)
+    assert stats.max_depth == 6
+    assert set(stats.phase_seconds) == {'validation', 'ordering', 'closure'}
+    assert set(phases) == set(stats.phase_seconds)
+
+    deps.affected_by(['F'])
+    deps.affected_by(['F'])
+    assert stats.counters['affected_cache_misses'] == 1
+    assert stats.counters['affected_cache_hits'] == 1
+    assert set(stats.as_dict()) == {'counters', 'max_depth', 'phase_seconds'}
+    stats.reset()
+    assert stats.counters == {} and stats.max_depth == 0
+
+    assert Dependencies(items_0_mistakes).stats is None
+    assert Dependencies(items_0_mistakes, stats=True).stats.counters == {}
+
+
+def test_resolve_for():
+    """Only the items that the targets depend on are ordered and completed,
+    and completed items are reused until they change
+    """
+    deps = Dependencies(items_2_mistakes, stats=True)
+    assert deps.resolve_for(['F', 'B']) == ['F', 'B']
+    with pytest.raises(CircularDependencyException):
+        deps.resolve_for(['C'])
+    deps = Dependencies({'A': ['B', 'Y'], 'B': [], 'C': ['B']})
+    assert deps.complete_dependencies('C') == ['B']
+    with pytest.raises(MissingDependencyException):
+        deps.resolve_for(['A'])
+
+    deps = Dependencies(items_0_mistakes, stats=True)
+    ordering = deps.resolve_for(['C', 'B'])
+    assert sorted(ordering) == ['B', 'C', 'D', 'E', 'F']
+    assert deps.is_correct_ordering(ordering)
+
+    assert deps.complete_dependencies('D') == ['B', 'E', 'F']
+    assert deps.stats.counters['nodes_visited'] == 4
+    assert deps.complete_dependencies('A') == ['B', 'C', 'D', 'E', 'F']
+    assert deps.complete_dependencies('D') == ['B', 'E', 'F']
+    assert deps.stats.counters == {'closure_misses': 2, 'closure_hits': 1, 
+                                   'nodes_visited': 6}
+    assert deps._known_dependencies is None
+
+    deps.modify_item('E', [])
+    assert deps.complete_dependencies('A') == ['B', 'C', 'D', 'E']
+    assert deps.complete_dependencies('F') == []
+    assert {item: sorted(deps.complete_dependencies(item)) for item in 
+            items_0_mistakes} == deps.complete_dependencies_dict()
+
+
+def test_depends_on():
+    """The reachability index agrees with the complete dependencies, and is 
+    rebuilt after items change
+    """
+    deps = Dependencies(items_0_mistakes)
+    complete = Dependencies(items_0_mistakes).complete_dependencies_dict()
+    pairs = [(item, dependency) for item in items_0_mistakes 
+             for dependency in items_0_mistakes]
+    assert deps.depends_on_many(pairs) == \
+        [dependency in complete[item] for item, dependency in pairs]
+    assert deps.depends_on('Z', 'F') and not deps.depends_on('F', 'Z')
+    assert not deps.depends_on('A', 'A')
+    assert deps._known_dependencies is None
+
+    deps.modify_item('E', [])
+    assert not deps.depends_on('Z', 'F')
+    deps.add_item('G', ['F'])
+    assert deps.depends_on('G', 'F')
+    with pytest.raises(KeyError):
+        deps.depends_on('Y', 'A')
+
+
+def test_freeze():
+    """Frozen snapshots are computed up front, can be queried from many 
+    threads at once, and are changed by copy-on-write
+    """
+    deps = Dependencies(items_0_mistakes)
+    frozen = deps.freeze()
+    assert isinstance(frozen, FrozenDependencies)
+    assert frozen.freeze() is frozen
+    assert frozen._known_dependencies is None
+    assert frozen.complete_dependencies('C') == ['B', 'D', 'E', 'F']
+    assert frozen.complete_dependencies_dict() == \
+        deps.complete_dependencies_dict()
+    assert frozen.freeze(complete=True)._known_dependencies is not None
+    assert deps.freeze()._known_dependencies is not None
+    with pytest.raises(TypeError):
+        frozen.add_item('G', ['Z'])
+    with pytest.raises(CircularDependencyException):
+        FrozenDependencies(items_1_mistakes)
+
+    def query(_):
+        return (frozen.resolve_dependencies(), frozen.complete_dependencies('Z'),
+                frozen.affected_by(['F']), frozen.depends_on('Z', 'F'))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(query, range(200)))
+    assert all(result == results[0] for result in results)
+
+    changed = frozen.with_item('E', []).with_item('G', ['E'])
+    assert not changed.depends_on('Z', 'F') and changed.depends_on('G', 'E')
+    assert changed.without_item('G').dependencies == \
+        dict(items_0_mistakes, E=[])
+    assert frozen.dependencies == items_0_mistakes
+    assert frozen.depends_on('Z', 'F')
+    assert 'G' not in deps.dependencies
+
+    thawed = changed.thaw()
+    thawed.remove_item('G')
+    assert 'G' in changed.dependencies
+
+    # A snapshot counts into its own stats, not those it was frozen from
+    deps = Dependencies(items_0_mistakes, stats=True)
+    frozen = deps.freeze()
+    assert frozen.stats is not deps.stats
+    frozen.affected_by(['F'])
+    assert 'affected_cache_misses' not in deps.stats.counters
+    assert Dependencies(items_0_mistakes).freeze().stats is None
+
+    # Snapshots can also be built straight from edges
+    frozen = FrozenDependencies.from_edges([('A', 'B'), ('B', None)])
+    assert isinstance(frozen, FrozenDependencies)
+    assert frozen.resolve_dependencies() == ['B', 'A']
+    assert frozen.depends_on('A', 'B')
+
+
+def test_critical_path():
+    """The critical path, start times with slack and simulated makespans all 
+    follow the durations of the items
+    """
+    deps = Dependencies(items_0_mistakes)
+    durations = {'A': 1, 'B': 5, 'C': 1, 'D': 2, 'E': 1, 'F': 1, 'Z': 1}
+    assert deps.critical_path(durations) == (10, ['B', 'D', 'C', 'A', 'Z'])
+    assert deps.critical_path(lambda item: 1) == \
+        (6, ['F', 'E', 'D', 'C', 'A', 'Z'])
+
+    start_times = deps.start_times(durations)
+    assert start_times['E'] == {'earliest_start': 1, 'latest_start': 4, 
+                                'slack': 3}
+    assert [item for item, times in start_times.items() 
+            if times['slack'] == 0] == ['A', 'B', 'C', 'D', 'Z']
+
+    assert deps.estimate_makespan(durations, 1)[0] == sum(durations.values())
+    makespan, starts = deps.estimate_makespan(durations, 2)
+    assert makespan == 10
+    assert starts == {'B': 0, 'F': 0, 'E': 1, 'D': 5, 'C': 7, 'A': 8, 'Z': 9}
+
+    with pytest.raises(KeyError):
+        deps.critical_path({'A': 1})
+    assert Dependencies({}).critical_path({}) == (0, [])
+
+
+def test_transitive_reduction():
+    """Redundant and repeated dependencies are removed, without changing the 
+    correct orderings or complete dependencies
+    """
+    reduced = {'A': ['C'], 'B': [], 'C': ['D'], 'D': ['B', 'E'], 'E': ['F'], 
+               'F': [], 'Z': ['A']}
+    redundant = [('A', 'B'), ('A', 'D'), ('Z', 'B'), ('Z', 'C'), ('Z', 'D')]
+    for closure_mode in (None,) + Dependencies.closure_modes:
+        deps = Dependencies(items_0_mistakes, closure_mode=closure_mode or 
+                            "sets")
+        if closure_mode is not None:
+            deps.complete_dependencies_dict()
+        assert deps.transitive_reduction() == reduced
+        assert deps.transitive_reduction(report_redundant=True) == \
+            (reduced, redundant)
+        orders = Dependencies(reduced).all_possible_resolution_orders()
+        assert sorted(map(list, orders)) == \
+            sorted(map(list, items_0_mistakes_all_possible_correct))
+
+    deps = Dependencies({'A': ['B', 'B'], 'B': []})
+    assert deps.transitive_reduction(report_redundant=True) == \
+        ({'A': ['B'], 'B': []}, [('A', 'B')])
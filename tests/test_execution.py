@@ -0,0 +1,191 @@
+"""test_execution.py - tests for running tasks over the dependencies
+"""
+
+import asyncio
+from functools import partial
+import pickle
+import threading
+
+from dependency_algorithm import (
+    Dependencies,
+    DirectoryRunCache,
+    SQLiteRunCache
+)
+import pytest
+
+from .test_dependency_algorithm import items_0_mistakes
+
+
+def double(item):
+    """Picklable task for the process pool
+    """
+    return item * 2
+
+
+def test_execute_in_dependency_order():
+    """Every task starts after the tasks of its dependencies have finished
+    """
+    finished = set()
+    lock = threading.Lock()
+
+    def task(item):
+        with lock:
+            assert all(dependency in finished 
+                       for dependency in items_0_mistakes[item])
+        with lock:
+            finished.add(item)
+        return item.lower()
+
+    results = Dependencies(items_0_mistakes).execute(task, max_workers=3)
+    assert {item: result.status for item, result in results.items()} == \
+        {item: "succeeded" for item in items_0_mistakes}
+    assert results['A'].result == 'a'
+    assert results['A'].duration >= 0
+
+
+def test_execute_failures():
+    """Items that depend on a failed task are skipped, and fail_fast stops 
+    everything else
+    """
+    def task(item):
+        if item == 'E':
+            raise RuntimeError("E failed")
+        return item
+
+    deps = Dependencies(items_0_mistakes)
+    results = deps.execute(task, fail_fast=False)
+    statuses = {item: result.status for item, result in results.items()}
+    assert statuses == {'A': 'skipped', 'B': 'succeeded', 'C': 'skipped', 
+                        'D': 'skipped', 'E': 'failed', 'F': 'succeeded', 
+                        'Z': 'skipped'}
+    assert isinstance(results['E'].exception, RuntimeError)
+
+    results = deps.execute({item: (lambda item=item: task(item)) 
+                            for item in items_0_mistakes}, max_workers=1)
+    assert results['E'].status == 'failed'
+    assert results['Z'].status in ('skipped', 'cancelled')
+
+    with pytest.raises(KeyError):
+        deps.execute({'A': lambda: None})
+
+
+def test_execute_in_process_pool():
+    """Tasks can run in a process pool
+    """
+    results = Dependencies({1: [], 2: [1], 3: [1]}).execute(
+        double, executor="process", max_workers=2)
+    assert {item: result.result for item, result in results.items()} == \
+        {1: 2, 2: 4, 3: 6}
+
+    # A task that can't be pickled fails its item instead of the whole run
+    results = Dependencies({1: [], 2: [1], 3: []}).execute(
+        {1: lambda: 1, 2: partial(double, 2), 3: partial(double, 3)}, 
+        executor="process", max_workers=2, fail_fast=False)
+    assert results[1].status == 'failed' and results[1].exception is not None
+    assert results[2].status == 'skipped'
+    assert results[3].status == 'succeeded'
+
+
+def test_execute_async():
+    """Coroutines start once their dependencies finish, up to the concurrency
+    limit, and failures cancel the items downstream of them
+    """
+    finished = set()
+    running = []
+
+    async def task(item):
+        assert all(dependency in finished 
+                   for dependency in items_0_mistakes[item])
+        running.append(item)
+        assert len(running) <= 2
+        await asyncio.sleep(0.001)
+        running.remove(item)
+        finished.add(item)
+        if item == 'D':
+            raise RuntimeError("D failed")
+        return item
+
+    deps = Dependencies(items_0_mistakes)
+    results = asyncio.run(deps.execute_async(task, max_concurrency=2, 
+                                             fail_fast=False))
+    statuses = {item: result.status for item, result in results.items()}
+    assert statuses == {'A': 'skipped', 'B': 'succeeded', 'C': 'skipped', 
+                        'D': 'failed', 'E': 'succeeded', 'F': 'succeeded', 
+                        'Z': 'skipped'}
+    assert results['E'].result == 'E'
+    with pytest.raises(AssertionError):
+        asyncio.run(deps.execute_async(task, max_concurrency=0))
+
+
+@pytest.mark.parametrize("cache_class", [DirectoryRunCache, SQLiteRunCache])
+def test_execute_incremental(tmp_path, cache_class):
+    """Only the items whose inputs changed, or that depend on one that did, 
+    run again, and the least recently used results are evicted by size
+    """
+    ran = []
+
+    def task(item):
+        ran.append(item)
+        return item.lower()
+
+    deps = Dependencies(items_0_mistakes)
+    digests = {item: "v1" for item in items_0_mistakes}
+    cache = cache_class(str(tmp_path / "cache"))
+    results = deps.execute_incremental(task, digests, cache, max_workers=1)
+    assert sorted(ran) == sorted(items_0_mistakes)
+
+    # E is a dependency of D, which is a dependency of A, C and Z
+    del ran[:]
+    digests['E'] = "v2"
+    results = deps.execute_incremental(task, digests, cache, max_workers=1)
+    assert sorted(ran) == ['A', 'C', 'D', 'E', 'Z']
+    assert results['B'].status == 'cached' and results['B'].result == 'b'
+    assert results['A'].status == 'succeeded'
+
+    del ran[:]
+    results = deps.execute_incremental(task, digests, cache)
+    assert ran == []
+    assert {result.result for result in results.values()} == \
+        {item.lower() for item in items_0_mistakes}
+
+    # Room for about one result, so only the last one stored is kept
+    small_cache = cache_class(str(tmp_path / "small"), max_bytes=30)
+    deps.execute_incremental(task, digests, small_cache, max_workers=1)
+    del ran[:]
+    deps.execute_incremental(task, digests, small_cache, max_workers=1)
+    assert len(ran) == len(items_0_mistakes) - 1
+
+
+@pytest.mark.parametrize("cache_class", [DirectoryRunCache, SQLiteRunCache])
+def test_run_cache_replace(tmp_path, cache_class):
+    """Storing a result over another one doesn't count its bytes twice
+    """
+    size = len(pickle.dumps('a', protocol=pickle.HIGHEST_PROTOCOL))
+    cache = cache_class(str(tmp_path / "cache"), max_bytes=2 * size)
+    cache.put('a' * 64, 'a')
+    cache.put('b' * 64, 'b')
+    for _ in range(10):
+        cache.put('a' * 64, 'a')
+    assert cache.get('b' * 64) == (True, 'b')
+
+
+@pytest.mark.parametrize("cache_class", [DirectoryRunCache, SQLiteRunCache])
+def test_run_cache_unreadable(tmp_path, cache_class):
+    """A stored result that no longer unpickles is deleted and treated as a 
+    miss, so its task runs again
+    """
+    deps = Dependencies({'A': []})
+    cache = cache_class(str(tmp_path / "cache"))
+    stored = []
+    put = cache.put
+    cache.put = lambda fingerprint, result: \
+        stored.append(fingerprint) or put(fingerprint, result)
+    deps.execute_incremental(lambda item: 1, {'A': "v1"}, cache)
+    fingerprint, = stored
+    cache._store(fingerprint, pickle.dumps(1)[:-2])
+    assert cache.get(fingerprint) == (False, None)
+    assert cache._load(fingerprint) is None
+
+    cache._store(fingerprint, pickle.dumps(1)[:-2])
+    results = deps.execute_incremental(lambda item: 2, {'A': "v1"}, cache)
+    assert results['A'].status == 'succeeded' and results['A'].result == 2